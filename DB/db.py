@@ -1,13 +1,20 @@
 import pymysql
 from dotenv import load_dotenv
+from contextlib import contextmanager
+from functools import lru_cache
 import os
+import queue
 import re
+import threading
+import time
 from tqdm import tqdm
+from monitor.metrics import metrics
 
-# DB 연결
-def dbcon():
+# DB 설정 (.env는 프로세스에서 한 번만 읽음)
+@lru_cache(maxsize=None)
+def db_config():
     load_dotenv()
-    conn = pymysql.connect(
+    return dict(
         host=os.getenv('DB_HOST'),
         port=int(os.getenv('DB_PORT')),
         user=os.getenv('DB_USER'),
@@ -15,77 +22,364 @@ def dbcon():
         database=os.getenv('DB_DATABASE'),
         charset="utf8mb4",
     )
-    return conn
+
+# 쿼리 종류/테이블 (db_statement_seconds 라벨)
+STATEMENT_OP_RE = re.compile(r"^\s*(\w+)")
+STATEMENT_TABLE_RE = re.compile(r"\b(?:FROM|INTO|UPDATE|TABLE)\s+`?(\w+)", re.I)
+
+def statement_labels(query):
+    head = query[:300]
+    op = STATEMENT_OP_RE.match(head)
+    table = STATEMENT_TABLE_RE.search(head)
+    return {"op": op.group(1).upper() if op else "other", "table": table.group(1) if table else ""}
+
+# 실행 시간을 기록하는 커서
+# executemany는 내부에서 execute를 부르므로 execute만 재면 서버 왕복마다 한 번씩 기록됨
+class TimedCursorMixin:
+    def execute(self, query, args=None):
+        with metrics.timer("db_statement_seconds", **statement_labels(query)):
+            return super().execute(query, args)
+
+class TimedCursor(TimedCursorMixin, pymysql.cursors.Cursor):
+    pass
+
+class TimedSSCursor(TimedCursorMixin, pymysql.cursors.SSCursor):
+    pass
+
+# DB 연결 (새 연결, 보통은 get_conn()으로 풀에서 빌려 쓰기)
+def dbcon():
+    return pymysql.connect(**db_config(), cursorclass=TimedCursor)
+
+
+# 스레드 안전한 커넥션 풀
+# - 최대 size개까지 연결을 만들고 반납된 연결은 재사용
+# - health_check초 이상 쉬었던 연결은 꺼낼 때 ping으로 확인 (끊겼으면 재연결)
+# - 반납할 때 rollback해서 커밋 안 된 트랜잭션/오래된 스냅샷을 정리
+class ConnectionPool:
+    def __init__(self, size=5, timeout=30, health_check=30):
+        self.size = size
+        self.timeout = timeout
+        self.health_check = health_check
+        self.idle = queue.LifoQueue()
+        self.created = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        try:
+            conn, last_used = self.idle.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                can_create = self.created < self.size
+                if can_create:
+                    self.created += 1
+            if can_create:
+                try:
+                    return dbcon()
+                except Exception:
+                    with self.lock:
+                        self.created -= 1
+                    raise
+            try:
+                conn, last_used = self.idle.get(timeout=self.timeout)
+            except queue.Empty:
+                raise RuntimeError(f"DB 커넥션 풀 대기 시간 초과 (size={self.size})")
+
+        if time.monotonic() - last_used > self.health_check:
+            try:
+                conn.ping(reconnect=True)
+            except pymysql.Error:
+                self.discard(conn)
+                return self.acquire()
+        return conn
+
+    def release(self, conn):
+        try:
+            conn.rollback()
+        except pymysql.Error:
+            self.discard(conn)
+            return
+        self.idle.put((conn, time.monotonic()))
+
+    def discard(self, conn):
+        try:
+            conn.close()
+        except pymysql.Error:
+            pass
+        with self.lock:
+            self.created -= 1
+
+
+pool = None
+pool_lock = threading.Lock()
+
+
+# 프로세스 공용 풀 (DB_POOL_SIZE 환경변수로 크기 설정)
+def get_pool():
+    global pool
+    if pool is None:
+        with pool_lock:
+            if pool is None:
+                db_config()
+                pool = ConnectionPool(size=int(os.getenv('DB_POOL_SIZE', '5')))
+    return pool
+
+
+# 풀에서 연결 빌리기
+# with get_conn() as conn: ... 블록이 끝나면 자동 반납
+@contextmanager
+def get_conn():
+    pool = get_pool()
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
 
 # DB에서 최신 리뷰 ID 가져오기
 def get_latest_review_id():
-    conn = dbcon()
     latest_id = 0
-    try:
+    with get_conn() as conn:
         with conn.cursor() as cur:
             cur.execute("SELECT reviewID FROM tb_reviews ORDER BY reviewID DESC LIMIT 1")
             result = cur.fetchone()
             if result:
                 latest_id = result[0]
-    finally:
-        conn.close()
     return latest_id
 
+# 상품별 수집 기준점 (최신 리뷰ID, 최신 작성일) 가져오기
+# {오늘의집 상품ID: (reviewID, event_date)}
+def get_review_watermarks():
+    watermarks = {}
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT p.productID, MAX(r.reviewID), MAX(r.event_date)
+                FROM tb_reviews r
+                JOIN tb_products p ON r.goodsID = p.ID
+                GROUP BY p.productID
+            """)
+            for productID, review_id, event_date in cur.fetchall():
+                watermarks[productID] = (review_id, event_date)
+    return watermarks
+
+# 리스트/제너레이터를 size개씩 잘라서 반환
+def chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+# IN (%s, %s, ...) 자리표시자
+def placeholders(values):
+    return ", ".join(["%s"] * len(values))
+
+# 오늘의집 상품ID -> tb_products.ID 매핑 (product_map에 없는 것만 조회)
+def resolve_product_ids(cur, productIDs, product_map):
+    missing = [pid for pid in set(productIDs) if pid not in product_map]
+    if missing:
+        cur.execute(
+            f"SELECT productID, MIN(ID) FROM tb_products WHERE productID IN ({placeholders(missing)}) GROUP BY productID",
+            missing,
+        )
+        product_map.update(cur.fetchall())
+    return product_map
+
 # DB에 상품정보 저장 (중복 체크)
-def insert_product(products):
-    conn = dbcon()
-    try:
+# 이미 있는 상품은 한 번에 조회하고, 새 상품만 multi-row INSERT
+def insert_product(products, chunk_size=500):
+    inserted = 0
+    with get_conn() as conn:
         with conn.cursor() as cur:
-            sql_check = "SELECT ID FROM tb_products WHERE productID=%s"
             sql_insert = "INSERT INTO tb_products (productID, brand_name, product_name) VALUES (%s, %s, %s)"
-            
-            for data in products:
-                cur.execute(sql_check, (data['상품ID'],))
-                exists = cur.fetchone()
-                if not exists:
-                    cur.execute(sql_insert, (data['상품ID'], data['브랜드명'], data['제품명']))
-        conn.commit()
-    finally:
-        conn.close()
+
+            for chunk in chunked(products, chunk_size):
+                ids = [data['상품ID'] for data in chunk]
+                cur.execute(f"SELECT productID FROM tb_products WHERE productID IN ({placeholders(ids)})", ids)
+                existing = {row[0] for row in cur.fetchall()}
+
+                rows = []
+                for data in chunk:
+                    if data['상품ID'] in existing:
+                        continue
+                    existing.add(data['상품ID'])  # 입력 안의 중복도 제거
+                    rows.append((data['상품ID'], data['브랜드명'], data['제품명']))
+                if rows:
+                    cur.executemany(sql_insert, rows)
+                    inserted += len(rows)
+                    bump_data_version(cur)  # 대시보드 캐시 무효화 (같은 트랜잭션)
+                conn.commit()
+    print(f"상품 저장 완료! 신규 {inserted}개")
+    return inserted
 
 # DB에 상품 리뷰 저장 (최신 리뷰 체크 포함)
-def insert_product_review(reviews):
-    conn = dbcon()
-    try:
+# chunk_size개씩 multi-row INSERT 후 커밋, 중복 리뷰는 건너뜀
+def insert_product_review(reviews, chunk_size=500):
+    stats = {"inserted": 0, "duplicates": 0, "skipped": 0}
+    product_map = {}
+    with get_conn() as conn:
         with conn.cursor() as cur:
-            sql_product_id = "SELECT ID FROM tb_products WHERE productID=%s"
             sql_insert_review = """
                 INSERT INTO tb_reviews 
                 (goodsID, reviewID, customerID, nickname, options, grade, comment, event_date)
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
                 ON DUPLICATE KEY UPDATE reviewID = reviewID
             """
-            for review in reviews:
-                cur.execute(sql_product_id, (review['상품ID'],))
-                product = cur.fetchone()
-                if not product:
-                    continue
-                goodsID = product[0]
-                cur.execute(sql_insert_review, (
-                    goodsID,
-                    review['리뷰ID'],
-                    review['고객ID'],
-                    review['고객닉네임'],
-                    review['상품옵션'],
-                    float(review['별점']),
-                    review['작성내용'],
-                    review['작성날짜']
-                ))
-        conn.commit()
-    finally:
-        conn.close()
+            for chunk in chunked(reviews, chunk_size):
+                resolve_product_ids(cur, [review['상품ID'] for review in chunk], product_map)
+
+                # 이미 저장된 리뷰는 미리 걸러서 요약 테이블에 새 리뷰만 반영
+                review_ids = [review['리뷰ID'] for review in chunk]
+                cur.execute(f"SELECT reviewID FROM tb_reviews WHERE reviewID IN ({placeholders(review_ids)})", review_ids)
+                existing = {row[0] for row in cur.fetchall()}
+
+                rows = []
+                for review in chunk:
+                    goodsID = product_map.get(review['상품ID'])
+                    if goodsID is None:  # 상품 테이블에 없는 리뷰
+                        stats["skipped"] += 1
+                        continue
+                    if review['리뷰ID'] in existing:
+                        stats["duplicates"] += 1
+                        continue
+                    existing.add(review['리뷰ID'])  # 입력 안의 중복도 제거
+                    rows.append((
+                        goodsID,
+                        review['리뷰ID'],
+                        review['고객ID'],
+                        review['고객닉네임'],
+                        review['상품옵션'],
+                        float(review['별점']),
+                        review['작성내용'],
+                        review['작성날짜']
+                    ))
+                if rows:
+                    # 동시에 다른 프로세스가 넣은 중복 키는 변경이 없어서 affected rows에 잡히지 않음
+                    affected = cur.executemany(sql_insert_review, rows)
+                    stats["inserted"] += affected
+                    stats["duplicates"] += len(rows) - affected
+                    if affected < len(rows):
+                        rows = inserted_review_rows(cur, rows)
+                    apply_review_rollup(cur, rows)
+                    if affected:
+                        bump_data_version(cur)  # 대시보드 캐시 무효화 (같은 트랜잭션)
+                conn.commit()
+    for result, count in stats.items():
+        metrics.inc("reviews_ingested", count, result=result)
+    print(f"리뷰 저장 완료! 신규 {stats['inserted']}개, 중복 {stats['duplicates']}개, 상품 없음 {stats['skipped']}개")
+    return stats
+
+
 
+# rows 중 이 트랜잭션이 실제로 INSERT한 행만 남기기
+# 미리 조회한 뒤 INSERT 사이에 다른 프로세스가 같은 리뷰를 넣으면 그 행은 중복 키로 건너뛰어짐
+# 일반 SELECT(일관된 읽기)는 트랜잭션 시작 시점 스냅샷 + 자기 변경만 보므로 (REPEATABLE READ)
+# 미리 조회에 없던 리뷰 중 보이는 것은 이 트랜잭션이 넣은 행
+def inserted_review_rows(cur, rows):
+    review_ids = [row[1] for row in rows]
+    cur.execute(f"SELECT reviewID FROM tb_reviews WHERE reviewID IN ({placeholders(review_ids)})", review_ids)
+    inserted = {row[0] for row in cur.fetchall()}
+    return [row for row in rows if row[1] in inserted]
+
+# 상품별 평점 합계/리뷰 수 요약 테이블에 새 리뷰 반영 (실제로 INSERT한 행만 넘길 것)
+def apply_review_rollup(cur, rows):
+    if not rows:
+        return
+    summary = {}
+    for row in rows:
+        grade_sum, count = summary.get(row[0], (0.0, 0))
+        summary[row[0]] = (grade_sum + row[5], count + 1)
+    cur.executemany(
+        """
+        INSERT INTO tb_product_summary (productID, grade_sum, review_count)
+        VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE grade_sum = grade_sum + VALUES(grade_sum),
+                                review_count = review_count + VALUES(review_count)
+        """,
+        [(goodsID, grade_sum, count) for goodsID, (grade_sum, count) in summary.items()],
+    )
+
+# 분석 결과를 (상품, 카테고리, 감성)별 리뷰 수 / (상품, 카테고리, 키워드, 감성)별 문장 수 요약 테이블에 반영
+# links: (reviewID, keyword_id, productID, categoryID, sentiment)
+# sentiment_seen: 이번 실행에서 이미 센 (productID, categoryID, sentiment, reviewID)
+def apply_analyze_rollup(cur, links, sentiment_seen):
+    sentiment_counts = {}
+    keyword_hits = {}
+    for reviewID, keyword_id, productID, categoryID, sentiment in links:
+        if sentiment is None:
+            continue
+        key = (productID, categoryID, sentiment, reviewID)
+        if key not in sentiment_seen:
+            sentiment_seen.add(key)
+            sentiment_counts[key[:3]] = sentiment_counts.get(key[:3], 0) + 1
+        key = (productID, categoryID, keyword_id, sentiment)
+        keyword_hits[key] = keyword_hits.get(key, 0) + 1
+
+    if sentiment_counts:
+        cur.executemany(
+            """
+            INSERT INTO tb_sentiment_rollup (productID, categoryID, sentiment, review_count)
+            VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE review_count = review_count + VALUES(review_count)
+            """,
+            [(*key, count) for key, count in sentiment_counts.items()],
+        )
+    if keyword_hits:
+        cur.executemany(
+            """
+            INSERT INTO tb_keyword_rollup (productID, categoryID, keyword_id, sentiment, hits)
+            VALUES (%s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE hits = hits + VALUES(hits)
+            """,
+            [(*key, hits) for key, hits in keyword_hits.items()],
+        )
 
+# 요약 테이블 전체 재계산 (백필/복구용, migrations/0005와 같은 쿼리)
+ROLLUP_REBUILD_SQL = [
+    "DELETE FROM tb_product_summary",
+    """
+    INSERT INTO tb_product_summary (productID, grade_sum, review_count)
+    SELECT goodsID, COALESCE(SUM(grade), 0), COUNT(*)
+    FROM tb_reviews
+    GROUP BY goodsID
+    """,
+    "DELETE FROM tb_sentiment_rollup",
+    """
+    INSERT INTO tb_sentiment_rollup (productID, categoryID, sentiment, review_count)
+    SELECT ak.productID, ak.categoryID, a.sentiment, COUNT(DISTINCT a.reviewID)
+    FROM tb_analyze_keywords ak
+    JOIN tb_analyze a ON a.analyzeID = ak.analyzeID
+    WHERE a.sentiment IS NOT NULL
+    GROUP BY ak.productID, ak.categoryID, a.sentiment
+    """,
+    "DELETE FROM tb_keyword_rollup",
+    """
+    INSERT INTO tb_keyword_rollup (productID, categoryID, keyword_id, sentiment, hits)
+    SELECT ak.productID, ak.categoryID, ak.keyword_id, a.sentiment, COUNT(*)
+    FROM tb_analyze_keywords ak
+    JOIN tb_analyze a ON a.analyzeID = ak.analyzeID
+    WHERE a.sentiment IS NOT NULL
+    GROUP BY ak.productID, ak.categoryID, ak.keyword_id, a.sentiment
+    """,
+]
+
+# 수집(insert_product_review)/분석 저장(save_analyze_review)과 동시에 실행하지 말 것
+# 두 쪽 모두 요약 테이블을 증분으로 갱신하므로 재계산 도중에 커밋된 증가분이 빠지거나 두 번 반영될 수 있음
+def rebuild_rollups():
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            for sql in ROLLUP_REBUILD_SQL:
+                cur.execute(sql)
+            bump_data_version(cur)
+        conn.commit()
+    print("요약 테이블 재계산 완료!")
 
 # 분석테이블 전처리 된 상품목록 DB 저장
 def insert_product_list():
-    conn = dbcon()
-    try:
+    with get_conn() as conn:
         with conn.cursor() as cur:
             # tb_products에서 모든 상품 가져오기
             cur.execute("SELECT ID, product_name FROM tb_products")
@@ -106,90 +400,343 @@ def insert_product_list():
 
             conn.commit()
             print("분석DB에 전처리 상품목록 저장 완료! (중복 처리 포함)")
-    finally:
-        conn.close()
 
 # 분석테이블에 전처리된 리뷰내용 DB 저장
 def insert_clean_review(exclude_texts=None):
     if exclude_texts is None:
         exclude_texts = ["최고예요", "마음에 들어요", "보통이에요", "별로예요", "매우 아쉬워요"]
 
-    conn = dbcon()
     inserted_reviews = []
 
-    with conn.cursor() as cur:
-        # 리뷰 + productID 같이 가져오기
-        cur.execute("SELECT r.reviewID, r.comment, p.productID "
-                    "FROM tb_reviews r "
-                    "JOIN tb_products p ON r.goodsID = p.ID")
-        result = cur.fetchall()
-        for review_id, review_text, productID in result:
-            if review_text in exclude_texts:
-                continue
-            inserted_reviews.append((review_id, review_text, productID))
-    conn.close()
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            # 리뷰 + productID 같이 가져오기
+            cur.execute("SELECT r.reviewID, r.comment, p.productID "
+                        "FROM tb_reviews r "
+                        "JOIN tb_products p ON r.goodsID = p.ID")
+            result = cur.fetchall()
+            for review_id, review_text, productID in result:
+                if review_text in exclude_texts:
+                    continue
+                inserted_reviews.append((review_id, review_text, productID))
     print(f"제거완료, 분석할 리뷰 수 {len(inserted_reviews)}개")
     return inserted_reviews
 
 
 
 
+# 데이터 버전 조회 (대시보드 캐시 무효화용)
+def get_data_version():
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT version FROM tb_data_version WHERE id = 1")
+            row = cur.fetchone()
+            return row[0] if row else 0
+
+# 데이터 버전 +1 (새 데이터를 저장하는 트랜잭션 안에서 호출: 상품/리뷰 수집, 분석 결과 저장, 요약 재계산)
+def bump_data_version(cur):
+    cur.execute("""
+        INSERT INTO tb_data_version (id, version) VALUES (1, 1)
+        ON DUPLICATE KEY UPDATE version = version + 1
+    """)
+
+category_map = None
+
+# 카테고리명 -> categoryID (한 번만 조회)
+def get_category_map(cur):
+    global category_map
+    if category_map is None:
+        cur.execute("SELECT category, categoryID FROM tb_categories")
+        category_map = dict(cur.fetchall())
+    return category_map
+
+# tb_analyze에 multi-row INSERT 한 문장으로 저장하고 행마다 analyzeID 반환 (rows 순서대로)
+# multi-row INSERT는 행 수를 미리 알아서 auto-increment 값을 한 번에 연속으로 받음
+# -> 첫 행 ID(LAST_INSERT_ID()) + 순번 * auto_increment_increment
+def insert_analyze_rows(cur, rows):
+    inserted = cur.execute(
+        "INSERT INTO tb_analyze (productID, reviewID, sentence, sentiment, source) VALUES "
+        + ", ".join(["(%s, %s, %s, %s, %s)"] * len(rows)),
+        [value for row in rows for value in row],
+    )
+    cur.execute("SELECT LAST_INSERT_ID(), @@auto_increment_increment")
+    first_id, step = cur.fetchone()
+    if inserted != len(rows):
+        raise RuntimeError(f"tb_analyze 저장 행 수 불일치 ({inserted}/{len(rows)})")
+    return [first_id + i * step for i in range(len(rows))]
+
+keyword_collation = None
+
+# tb_keywords.keyword 컬럼의 collation (한 번만 조회)
+def get_keyword_collation(cur):
+    global keyword_collation
+    if keyword_collation is None:
+        cur.execute("""
+            SELECT COLLATION_NAME FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'tb_keywords' AND COLUMN_NAME = 'keyword'
+        """)
+        keyword_collation = cur.fetchone()[0]
+    return keyword_collation
+
+# (productID, categoryID, keyword) 목록 -> {입력 키: keyword_id}
+# 키워드 비교는 MySQL이 컬럼 collation으로 직접 함
+# (대소문자/끝 공백/악센트 처리가 uk_keywords 와 같아서 upsert가 합친 키워드는 같은 keyword_id를 받음)
+def find_keyword_ids(cur, keys):
+    keys = list(keys)
+    wanted = " UNION ALL ".join(["SELECT %s AS i, %s AS productID, %s AS categoryID, %s AS keyword"] * len(keys))
+    cur.execute(
+        f"SELECT q.i, k.keyword_id FROM tb_keywords k "
+        f"JOIN ({wanted}) q ON k.productID = q.productID AND k.categoryID = q.categoryID "
+        f"AND k.keyword = q.keyword COLLATE {get_keyword_collation(cur)}",
+        [value for i, key in enumerate(keys) for value in (i, *key)],
+    )
+    return {keys[i]: keyword_id for i, keyword_id in cur.fetchall()}
+
+# 분석 결과를 리뷰 단위로 묶기 (한 리뷰의 문장이 여러 청크로 나뉘지 않게)
+# 분석 결과는 리뷰별로 연속해서 들어오므로 리뷰가 바뀔 때만 자름
+def chunked_by_review(results, size):
+    chunk = []
+    for item in results:
+        if len(chunk) >= size and (item["review_id"], item["productID"]) != (chunk[-1]["review_id"], chunk[-1]["productID"]):
+            yield chunk
+            chunk = []
+        chunk.append(item)
+    if chunk:
+        yield chunk
+
+# 리뷰 분석 완료 기록 (체크포인트) + 작업 큐에 있으면 완료 처리
+def mark_analyzed(cur, reviews):
+    if reviews:
+        reviews = list(reviews)
+        affected = cur.executemany(
+            "INSERT IGNORE INTO tb_analyze_progress (reviewID, productID) VALUES (%s, %s)",
+            reviews,
+        )
+        metrics.inc("reviews_analyzed", affected)
+        review_ids = [rid for rid, _ in reviews]
+        cur.execute(
+            f"UPDATE tb_analyze_queue SET status = 'done', lease_until = NULL "
+            f"WHERE reviewID IN ({placeholders(review_ids)}) AND status <> 'done'",
+            review_ids,
+        )
+
+# worker가 아직 점유 중인 (또는 이미 완료 처리한) 작업만 잠그고 reviewID 집합 반환 (저장 트랜잭션 안에서 호출)
+# lease가 만료돼서 다른 worker가 가져간 작업은 빠짐 -> 같은 리뷰를 두 번 저장하지 않음
+# 잠근 행은 SKIP LOCKED 로 가져가는 claim_analyze_jobs 가 커밋 전까지 건너뜀
+def lock_owned_jobs(cur, worker, review_ids):
+    if not review_ids:
+        return set()
+    cur.execute(
+        f"""
+        SELECT reviewID FROM tb_analyze_queue
+        WHERE reviewID IN ({placeholders(review_ids)}) AND worker = %s AND status IN ('running', 'done')
+        FOR UPDATE
+        """,
+        [*review_ids, worker],
+    )
+    return {row[0] for row in cur.fetchall()}
+
 # 분석테이블에 LLM (리뷰 카테고리, 키워드 ,감성) 분석 내용 DB 저장 + 키워드 저장 
-def save_analyze_review(all_results):
-    conn = dbcon()
-    try:
+# - 리뷰 단위 청크로 저장하고 같은 트랜잭션에서 tb_analyze_progress에 완료 기록 (체크포인트)
+#   중간에 죽어도 커밋된 리뷰는 다음 실행에서 분석/저장하지 않음
+# - 이미 완료 기록이 있는 리뷰는 청크마다 한 번에 조회해서 건너뜀
+# - done_reviews: 저장할 문장이 없어도 분석이 끝난 (reviewID, productID) (카테고리 없는 리뷰 등)
+# - tb_analyze는 multi-row INSERT 한 문장 (insert_analyze_rows), 결과의 source(llm/local)도 같이 저장 (로컬 분류기 학습 데이터 구분)
+# - 키워드는 (productID, categoryID, keyword)별로 메모리에서 합산한 뒤
+#   uk_keywords 유니크 키로 INSERT ... ON DUPLICATE KEY UPDATE 한 번에 반영
+# - 문장과 키워드(카테고리 포함) 연결은 tb_analyze_keywords에 저장 (대시보드 조회용)
+# - 감성/키워드 요약 테이블도 같은 트랜잭션에서 증가
+# - worker: 작업 큐 worker 이름, 주면 그 worker가 점유 중인 리뷰만 저장 (lock_owned_jobs)
+def save_analyze_review(all_results, chunk_size=500, done_reviews=None, worker=None):
+    saved = 0
+    lost = 0
+    with get_conn() as conn:
         with conn.cursor() as cur:
-            
-            # 키워드 +1 카운트해서 DB저장 있으면 +1, 없으면 insert 
-            def insert_keyword(cur, productID, categoryID, keywords):
-                if not keywords:
-                    # print(f"[DEBUG] 키워드 없음 → productID={productID}")
-                    return
-                
-                for kw in keywords:
-                    # 1. 이미 있는 키워드 확인
-                    cur.execute("""
-                        SELECT keyword_id, count FROM tb_keywords
-                        WHERE productID=%s AND categoryID=%s AND keyword=%s
-                    """, (productID, categoryID, kw))
-                    data = cur.fetchone()
-
-                    # 2. 없으면 INSERT
-                    if data is None:
-                        cur.execute("""
-                            INSERT INTO tb_keywords (productID, categoryID, keyword, count)
-                            VALUES (%s, %s, %s, 1)
-                        """, (productID, categoryID, kw))
-                        # print(f"[DEBUG] 키워드 신규 저장 → productID={productID} keyword={kw}")
-                    # 3. 있으면 count + 1
-                    else:
-                        cur.execute("UPDATE tb_keywords SET count=count+1 WHERE keyword_id=%s", (data[0],))
-                        # print(f"[DEBUG] 키워드 count +1 → productID={productID} keyword={kw} old_count={data[1]}")
-
-            for item in tqdm(all_results, desc="분석 결과 DB 저장 및 키워드 처리"):
-                productID = item["productID"]
-                cur.execute("SELECT categoryID FROM tb_categories WHERE category=%s", (item['category'],))
-                cat = cur.fetchone()
-                if not cat:
-                    # print(f"[DEBUG] category 미존재 → {item['category']}")
-                    continue
-                categoryID = cat[0]
+            categories = get_category_map(cur)
+            sentiment_seen = set()
+            marked = set()
+
+            for chunk in tqdm(list(chunked_by_review(all_results, chunk_size)), desc="분석 결과 DB 저장 및 키워드 처리"):
+                pairs = {(item["review_id"], item["productID"]) for item in chunk} - marked
+                existing = set()
+                if pairs:
+                    review_ids = [rid for rid, _ in pairs]
+                    cur.execute(
+                        f"SELECT reviewID, productID FROM tb_analyze_progress WHERE reviewID IN ({placeholders(review_ids)})",
+                        review_ids,
+                    )
+                    existing = set(cur.fetchall())
+                existing |= marked  # 입력 안에서 같은 리뷰가 다시 나온 경우
+                if worker and pairs:
+                    owned = lock_owned_jobs(cur, worker, [rid for rid, _ in pairs - existing])
+                    not_owned = {pair for pair in pairs - existing if pair[0] not in owned}
+                    lost += len(not_owned)
+                    existing |= not_owned
+
+                analyze_rows = []
+                row_keywords = []  # analyze_rows와 같은 순서로 (categoryID, 키워드 목록)
+                keyword_counts = {}
+                for item in chunk:
+                    productID = item["productID"]
+                    categoryID = categories.get(item["category"])
+                    if categoryID is None:  # category 미존재
+                        continue
+                    if (item["review_id"], productID) in existing:  # 이미 분석된 리뷰 건너뜀
+                        continue
 
-                cur.execute("SELECT sentiment FROM tb_analyze WHERE reviewID=%s AND productID=%s",
-                            (item["review_id"], productID))
-                if cur.fetchone():
-                    # print(f"[DEBUG] 이미 분석된 리뷰 건너뜀 → reviewID={item['review_id']}")
+                    analyze_rows.append((
+                        productID, item["review_id"], item["sentence"], item["sentiment"], item.get("source", "llm")
+                    ))
+                    keywords = [kw for kw in item["keywords"] or [] if isinstance(kw, str) and kw.strip()]
+                    row_keywords.append((categoryID, keywords))
+                    for kw in keywords:
+                        key = (productID, categoryID, kw)
+                        keyword_counts[key] = keyword_counts.get(key, 0) + 1
+
+                done = pairs - existing
+                if not analyze_rows:
+                    mark_analyzed(cur, done)
+                    marked |= done
+                    conn.commit()
                     continue
 
-                cur.execute("INSERT INTO tb_analyze (productID, reviewID, sentence, sentiment) VALUES (%s,%s,%s,%s)",
-                            (productID, item["review_id"], item["sentence"], item["sentiment"]))
-                # print(f"[DEBUG] tb_analyze 저장 완료 → reviewID={item['review_id']}")
+                analyze_ids = insert_analyze_rows(cur, analyze_rows)
+                saved += len(analyze_rows)
+
+                # 키워드 저장: 있으면 count 누적, 없으면 insert
+                if keyword_counts:
+                    cur.executemany(
+                        """
+                        INSERT INTO tb_keywords (productID, categoryID, keyword, count)
+                        VALUES (%s, %s, %s, %s)
+                        ON DUPLICATE KEY UPDATE count = count + VALUES(count)
+                        """,
+                        [(pid, cid, kw, cnt) for (pid, cid, kw), cnt in keyword_counts.items()],
+                    )
+
+                    # 문장 - 키워드 연결 저장
+                    keyword_ids = find_keyword_ids(cur, keyword_counts)
+                    link_rows = {}
+                    for analyzeID, (productID, reviewID, _, sentiment, _), (categoryID, keywords) in zip(
+                        analyze_ids, analyze_rows, row_keywords
+                    ):
+                        for kw in keywords:
+                            keyword_id = keyword_ids.get((productID, categoryID, kw))
+                            if keyword_id is not None:
+                                link_rows[(analyzeID, keyword_id)] = (reviewID, keyword_id, productID, categoryID, sentiment)
+                    if link_rows:
+                        cur.executemany(
+                            """
+                            INSERT IGNORE INTO tb_analyze_keywords (analyzeID, keyword_id, productID, categoryID)
+                            VALUES (%s, %s, %s, %s)
+                            """,
+                            [(analyzeID, keyword_id, link[2], link[3]) for (analyzeID, keyword_id), link in link_rows.items()],
+                        )
+                        apply_analyze_rollup(cur, link_rows.values(), sentiment_seen)
+                mark_analyzed(cur, done)
+                marked |= done
+                conn.commit()
 
-                # 키워드 저장
-                insert_keyword(cur, productID, categoryID, item["keywords"])
-                # print(f"[DEBUG] insert_keyword 저장 완료 → reviewID={item['review_id']} keywords={item['keywords']}")
+            # 문장 결과 없이 끝난 리뷰도 완료 기록
+            remaining = set(done_reviews or ()) - marked
+            if worker and remaining:
+                owned = lock_owned_jobs(cur, worker, [rid for rid, _ in remaining])
+                lost += len({pair for pair in remaining if pair[0] not in owned})
+                remaining = {pair for pair in remaining if pair[0] in owned}
+            mark_analyzed(cur, remaining)
+
+            # 대시보드 캐시 무효화
+            bump_data_version(cur)
+            conn.commit()
+
+    metrics.inc("analyze_rows_saved", saved)
+    if lost:
+        metrics.inc("analyze_jobs_lost", lost)
+        print(f"lease가 만료돼 다른 worker가 가져간 리뷰 {lost}개는 저장하지 않음")
+    print(f"분석DB 및 키워드 DB 저장 완료! 총 {len(all_results)}개 중 {saved}개 저장")
+
+# LLM 분석 작업 큐(tb_analyze_queue)에 리뷰 (reviewID, 내용, productID) 목록 추가
+# 이미 있는 리뷰는 그대로 둠 (analyzer/worker.py 가 가져가서 처리)
+def enqueue_analyze_jobs(inserted_reviews, chunk_size=1000):
+    enqueued = 0
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            for chunk in chunked(inserted_reviews, chunk_size):
+                enqueued += cur.executemany(
+                    "INSERT IGNORE INTO tb_analyze_queue (reviewID, productID) VALUES (%s, %s)",
+                    [(rid, productID) for rid, _, productID in chunk],
+                )
+                conn.commit()
+    metrics.inc("analyze_jobs_enqueued", enqueued)
+    print(f"분석 작업 큐 등록 완료! {len(inserted_reviews)}개 중 신규 {enqueued}개")
+    return enqueued
 
+# 작업 batch_size개 가져오기 (다른 worker가 잠근 행은 SKIP LOCKED로 건너뜀)
+# - pending 이거나 lease가 지난 running 작업을 가져와서 lease_seconds 동안 점유
+# - max_attempts 번 넘게 lease가 만료된 작업은 failed 로 돌림
+# 반환: [(reviewID, productID)]
+def claim_analyze_jobs(worker, batch_size=50, lease_seconds=600, max_attempts=3):
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE tb_analyze_queue
+                SET status = 'failed', lease_until = NULL, last_error = 'lease expired'
+                WHERE status = 'running' AND lease_until < NOW() AND attempts >= %s
+                """,
+                (max_attempts,),
+            )
+            cur.execute(
+                """
+                SELECT reviewID, productID FROM tb_analyze_queue
+                WHERE status = 'pending' OR (status = 'running' AND lease_until < NOW())
+                ORDER BY reviewID
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+                """,
+                (batch_size,),
+            )
+            jobs = list(cur.fetchall())
+            if jobs:
+                review_ids = [rid for rid, _ in jobs]
+                cur.execute(
+                    f"""
+                    UPDATE tb_analyze_queue
+                    SET status = 'running', worker = %s, attempts = attempts + 1,
+                        lease_until = NOW() + INTERVAL %s SECOND
+                    WHERE reviewID IN ({placeholders(review_ids)})
+                    """,
+                    [worker, lease_seconds, *review_ids],
+                )
+        conn.commit()
+    metrics.inc("analyze_jobs_claimed", len(jobs))
+    return jobs
+
+# 아직 처리 중인 작업의 lease 연장 (체크포인트마다 호출)
+def extend_analyze_leases(worker, lease_seconds=600):
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE tb_analyze_queue SET lease_until = NOW() + INTERVAL %s SECOND
+                WHERE worker = %s AND status = 'running'
+                """,
+                (lease_seconds, worker),
+            )
+        conn.commit()
+
+# 실패한 작업을 다시 pending 으로 (시도 횟수를 다 쓰면 failed)
+def release_analyze_jobs(worker, review_ids, error, max_attempts=3):
+    if not review_ids:
+        return
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                UPDATE tb_analyze_queue
+                SET status = IF(attempts >= %s, 'failed', 'pending'), lease_until = NULL, last_error = %s
+                WHERE worker = %s AND status = 'running' AND reviewID IN ({placeholders(review_ids)})
+                """,
+                [max_attempts, str(error)[:255], worker, *review_ids],
+            )
         conn.commit()
-        print(f"분석DB 및 키워드 DB 저장 완료! 총 {len(all_results)}개 처리")
-    finally:
-        conn.close()
\ No newline at end of file
@@ -0,0 +1,123 @@
+from db.db import get_conn
+
+# EXPLAIN으로 확인할 대시보드/파이프라인 쿼리
+# (이름, SQL, 파라미터 종류) - 파라미터는 DB에 있는 상품/카테고리 하나로 채움
+QUERIES = [
+    # crawler
+    ("get_review_watermarks", """
+        SELECT p.productID, MAX(r.reviewID), MAX(r.event_date)
+        FROM tb_reviews r
+        JOIN tb_products p ON r.goodsID = p.ID
+        GROUP BY p.productID
+    """, ()),
+    # db.insert_product / insert_product_review
+    ("resolve_product_ids", """
+        SELECT productID, MIN(ID) FROM tb_products WHERE productID IN (%s) GROUP BY productID
+    """, ("ohou_product",)),
+    # analyzer.iter_clean_reviews
+    ("iter_clean_reviews", """
+        SELECT r.reviewID, r.comment, p.ID
+        FROM tb_reviews r
+        JOIN tb_products p ON r.goodsID = p.ID
+        WHERE r.comment IS NOT NULL
+          AND r.comment NOT IN ('최고예요', '마음에 들어요', '보통이에요', '별로예요', '매우 아쉬워요')
+          AND NOT EXISTS (
+              SELECT 1 FROM tb_analyze_progress ap WHERE ap.reviewID = r.reviewID
+          )
+    """, ()),
+    # db.save_analyze_review
+    ("save_analyze_review (중복 확인)", """
+        SELECT reviewID, productID FROM tb_analyze_progress WHERE reviewID IN (%s)
+    """, ("review",)),
+    # 대시보드
+    ("get_reviews", """
+        SELECT r.reviewID, r.nickname, r.grade, r.comment, r.event_date
+        FROM tb_reviews r
+        JOIN tb_products p ON r.goodsID = p.ID
+        JOIN tb_analyze_products ap ON ap.productID = p.ID
+        WHERE ap.productID = %s
+    """, ("product",)),
+    ("get_rating_and_count", """
+        SELECT grade_sum / review_count, review_count FROM tb_product_summary WHERE productID=%s
+    """, ("product",)),
+    ("get_keyword_count", """
+        SELECT keyword, sum(count) as co FROM tb_keywords WHERE productID=%s GROUP BY keyword ORDER BY co DESC LIMIT 10
+    """, ("product",)),
+    ("get_sentiment_count", """
+        SELECT sentiment, review_count
+        FROM tb_sentiment_rollup
+        WHERE productID = %s
+          AND categoryID = %s
+          AND review_count > 0
+        ORDER BY sentiment
+    """, ("product", "category")),
+    ("get_keyword_count_by_category", """
+        SELECT keyword, SUM(count) as cnt
+        FROM tb_keywords
+        WHERE productID=%s AND categoryID=%s
+        GROUP BY keyword
+        ORDER BY cnt DESC
+        LIMIT 3
+    """, ("product", "category")),
+    ("get_reviews_by_category", """
+        SELECT
+            r.reviewID, r.nickname, r.grade, r.comment, r.event_date,
+            GROUP_CONCAT(DISTINCT k.keyword) AS keywords
+        FROM tb_analyze_keywords ak
+        JOIN tb_analyze a ON a.analyzeID = ak.analyzeID
+        JOIN tb_keywords k ON k.keyword_id = ak.keyword_id
+        JOIN tb_reviews r
+          ON r.reviewID = a.reviewID
+         AND r.goodsID  = a.productID
+        WHERE ak.productID = %s
+          AND ak.categoryID = %s
+        GROUP BY r.reviewID, r.nickname, r.grade, r.comment, r.event_date
+        ORDER BY r.event_date DESC
+        LIMIT 5
+    """, ("product", "category")),
+    ("get_keywords_by_sentiment", """
+        SELECT k.keyword, kr.sentiment, kr.hits
+        FROM tb_keyword_rollup kr
+        JOIN tb_keywords k ON k.keyword_id = kr.keyword_id
+        WHERE kr.productID = %s
+          AND kr.categoryID = %s
+        ORDER BY kr.hits DESC
+    """, ("product", "category")),
+]
+
+
+# EXPLAIN에 넣을 샘플 파라미터 (DB에 있는 값 하나씩)
+def sample_params(cur):
+    samples = {"product": 0, "ohou_product": 0, "category": 0, "review": 0}
+    cur.execute("SELECT ID, productID FROM tb_products ORDER BY ID LIMIT 1")
+    row = cur.fetchone()
+    if row:
+        samples["product"], samples["ohou_product"] = row
+    cur.execute("SELECT categoryID FROM tb_categories ORDER BY categoryID LIMIT 1")
+    row = cur.fetchone()
+    if row:
+        samples["category"] = row[0]
+    cur.execute("SELECT reviewID FROM tb_reviews ORDER BY reviewID DESC LIMIT 1")
+    row = cur.fetchone()
+    if row:
+        samples["review"] = row[0]
+    return samples
+
+
+# 쿼리별 실행 계획 출력 (table, type, key, rows, Extra)
+def explain_all():
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            samples = sample_params(cur)
+            for name, sql, kinds in QUERIES:
+                cur.execute("EXPLAIN " + sql, tuple(samples[kind] for kind in kinds) or None)
+                columns = [desc[0] for desc in cur.description]
+                print(f"\n== {name}")
+                for row in cur.fetchall():
+                    plan = dict(zip(columns, row))
+                    print(f"  {str(plan['table']):<22} type={str(plan['type']):<7} key={plan['key']} "
+                          f"rows={plan['rows']} {plan['Extra'] or ''}")
+
+
+if __name__ == "__main__":
+    explain_all()
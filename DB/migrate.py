@@ -0,0 +1,75 @@
+from db.db import get_conn
+import os
+import re
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+MIGRATION_FILE = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+
+# migrations 폴더의 번호가 붙은 SQL 파일 목록 (번호순)
+def list_migrations():
+    migrations = []
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    return sorted(migrations)
+
+
+# SQL 파일 -> 문장 목록 (-- 주석 제거, ; 기준 분리)
+def split_statements(sql):
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    return [stmt.strip() for stmt in "\n".join(lines).split(";") if stmt.strip()]
+
+
+MIGRATE_LOCK = "schema_migrate"
+
+
+# 적용 안 된 마이그레이션을 순서대로 실행하고 schema_version에 기록
+# MySQL DDL은 자동 커밋되므로 마이그레이션 하나가 중간에 실패하면 수동 확인 필요
+# worker 컨테이너 여러 개가 동시에 시작해도 한 곳에서만 적용되도록 GET_LOCK 으로 직렬화
+# (락을 얻은 뒤에 schema_version을 읽으므로 다른 프로세스가 먼저 적용한 마이그레이션은 건너뜀)
+def migrate(lock_timeout=60):
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT GET_LOCK(%s, %s)", (MIGRATE_LOCK, lock_timeout))
+            if cur.fetchone()[0] != 1:
+                raise RuntimeError(f"마이그레이션 락 대기 시간 초과 ({lock_timeout}초)")
+            try:
+                applied_now = apply_migrations(conn, cur)
+            finally:
+                cur.execute("SELECT RELEASE_LOCK(%s)", (MIGRATE_LOCK,))
+
+    if not applied_now:
+        print("적용할 마이그레이션 없음")
+    return applied_now
+
+
+# 마이그레이션 락을 잡은 상태에서 호출
+def apply_migrations(conn, cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cur.execute("SELECT version FROM schema_version")
+    applied = {row[0] for row in cur.fetchall()}
+
+    applied_now = []
+    for version, name, path in list_migrations():
+        if version in applied:
+            continue
+        with open(path, encoding="utf-8") as f:
+            for stmt in split_statements(f.read()):
+                cur.execute(stmt)
+        cur.execute("INSERT INTO schema_version (version, name) VALUES (%s, %s)", (version, name))
+        conn.commit()
+        applied_now.append(version)
+        print(f"마이그레이션 적용 완료: {version:04d}_{name}")
+    return applied_now
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,21 @@
+-- tb_keywords (productID, categoryID, keyword) 유니크 키
+-- save_analyze_review의 INSERT ... ON DUPLICATE KEY UPDATE count = count + VALUES(count)가 이 키를 사용
+
+-- 기존 중복 행은 count를 합쳐서 가장 오래된 행 하나로 정리
+UPDATE tb_keywords k
+JOIN (
+    SELECT MIN(keyword_id) AS keep_id, SUM(count) AS total
+    FROM tb_keywords
+    GROUP BY productID, categoryID, keyword
+    HAVING COUNT(*) > 1
+) d ON k.keyword_id = d.keep_id
+SET k.count = d.total;
+
+DELETE k FROM tb_keywords k
+JOIN tb_keywords keep
+  ON keep.productID = k.productID
+ AND keep.categoryID = k.categoryID
+ AND keep.keyword = k.keyword
+ AND keep.keyword_id < k.keyword_id;
+
+ALTER TABLE tb_keywords ADD UNIQUE KEY uk_keywords (productID, categoryID, keyword);
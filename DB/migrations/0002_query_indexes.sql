@@ -0,0 +1,16 @@
+-- 대시보드/파이프라인 쿼리용 복합 인덱스
+
+-- tb_reviews: goodsID로 조회 + event_date 정렬 (get_reviews, get_reviews_by_category)
+-- 상품별 MAX(reviewID), MAX(event_date) (get_review_watermarks)
+ALTER TABLE tb_reviews ADD INDEX idx_reviews_goods_date (goodsID, event_date, reviewID);
+
+-- tb_analyze: reviewID로 방금 저장한 문장의 analyzeID 조회 (save_analyze_review의 find_analyze_ids)
+-- (중복 확인/분석 안 된 리뷰 조회는 0006 이후 tb_analyze_progress 기본키를 사용,
+--  0006의 tb_analyze_progress 백필도 이 인덱스만 읽음)
+ALTER TABLE tb_analyze ADD INDEX idx_analyze_review (reviewID, productID);
+
+-- tb_analyze: 상품별 조회 (대시보드 감성/리뷰 쿼리)
+ALTER TABLE tb_analyze ADD INDEX idx_analyze_product (productID, reviewID);
+
+-- tb_products: 오늘의집 상품ID -> ID 매핑 (insert_product, insert_product_review)
+ALTER TABLE tb_products ADD INDEX idx_products_product_id (productID);
@@ -0,0 +1,22 @@
+-- 문장(tb_analyze) - 키워드(tb_keywords) 연결 테이블
+-- LLM이 문장에서 뽑은 키워드와 카테고리를 그대로 저장해서 대시보드가 LIKE 대신 인덱스 조인 사용
+CREATE TABLE tb_analyze_keywords (
+  analyzeID INT NOT NULL,
+  keyword_id INT NOT NULL,
+  productID INT NOT NULL,
+  categoryID INT NOT NULL,
+
+  PRIMARY KEY (analyzeID, keyword_id),
+  INDEX idx_analyze_keywords_product (productID, categoryID, analyzeID),
+  FOREIGN KEY (analyzeID) REFERENCES tb_analyze(analyzeID),
+  FOREIGN KEY (keyword_id) REFERENCES tb_keywords(keyword_id),
+  FOREIGN KEY (categoryID) REFERENCES tb_categories(categoryID)
+);
+
+-- 기존 분석 결과는 예전 대시보드와 같은 LIKE 매칭으로 한 번만 채움
+INSERT IGNORE INTO tb_analyze_keywords (analyzeID, keyword_id, productID, categoryID)
+SELECT a.analyzeID, k.keyword_id, a.productID, k.categoryID
+FROM tb_analyze a
+JOIN tb_keywords k
+  ON k.productID = a.productID
+ AND a.sentence LIKE CONCAT('%', k.keyword, '%');
@@ -0,0 +1,9 @@
+-- 데이터 버전 스탬프 (한 행)
+-- 상품/리뷰 수집, 분석 결과 저장, 요약 재계산 트랜잭션에서 version + 1, 대시보드는 이 값이 바뀌면 캐시를 버림
+CREATE TABLE tb_data_version (
+  id TINYINT PRIMARY KEY,
+  version BIGINT NOT NULL,
+  updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+INSERT INTO tb_data_version (id, version) VALUES (1, 0);
@@ -0,0 +1,52 @@
+-- 대시보드용 요약 테이블 (파이프라인이 저장할 때 증가, db.rebuild_rollups()로 전체 재계산)
+
+-- 상품별 평점 합계 / 리뷰 수
+CREATE TABLE tb_product_summary (
+  productID INT PRIMARY KEY,
+  grade_sum DOUBLE NOT NULL DEFAULT 0,
+  review_count INT NOT NULL DEFAULT 0,
+
+  FOREIGN KEY (productID) REFERENCES tb_products(ID)
+);
+
+-- (상품, 카테고리, 감성)별 리뷰 수
+CREATE TABLE tb_sentiment_rollup (
+  productID INT NOT NULL,
+  categoryID INT NOT NULL,
+  sentiment VARCHAR(20) NOT NULL,
+  review_count INT NOT NULL DEFAULT 0,
+
+  PRIMARY KEY (productID, categoryID, sentiment)
+);
+
+-- (상품, 카테고리, 키워드, 감성)별 문장 수
+CREATE TABLE tb_keyword_rollup (
+  productID INT NOT NULL,
+  categoryID INT NOT NULL,
+  keyword_id INT NOT NULL,
+  sentiment VARCHAR(20) NOT NULL,
+  hits INT NOT NULL DEFAULT 0,
+
+  PRIMARY KEY (productID, categoryID, keyword_id, sentiment),
+  FOREIGN KEY (keyword_id) REFERENCES tb_keywords(keyword_id)
+);
+
+-- 기존 데이터 백필 (db.ROLLUP_REBUILD_SQL과 같은 쿼리)
+INSERT INTO tb_product_summary (productID, grade_sum, review_count)
+SELECT goodsID, COALESCE(SUM(grade), 0), COUNT(*)
+FROM tb_reviews
+GROUP BY goodsID;
+
+INSERT INTO tb_sentiment_rollup (productID, categoryID, sentiment, review_count)
+SELECT ak.productID, ak.categoryID, a.sentiment, COUNT(DISTINCT a.reviewID)
+FROM tb_analyze_keywords ak
+JOIN tb_analyze a ON a.analyzeID = ak.analyzeID
+WHERE a.sentiment IS NOT NULL
+GROUP BY ak.productID, ak.categoryID, a.sentiment;
+
+INSERT INTO tb_keyword_rollup (productID, categoryID, keyword_id, sentiment, hits)
+SELECT ak.productID, ak.categoryID, ak.keyword_id, a.sentiment, COUNT(*)
+FROM tb_analyze_keywords ak
+JOIN tb_analyze a ON a.analyzeID = ak.analyzeID
+WHERE a.sentiment IS NOT NULL
+GROUP BY ak.productID, ak.categoryID, ak.keyword_id, a.sentiment;
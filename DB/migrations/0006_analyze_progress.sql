@@ -0,0 +1,16 @@
+-- 리뷰별 LLM 분석 완료 기록 (체크포인트)
+-- 리뷰의 모든 문장 결과가 저장되면 같은 트랜잭션에서 한 행 추가
+-- 카테고리가 없어서 tb_analyze에 행이 안 남는 리뷰도 기록되므로 재실행 시 다시 분석하지 않음
+CREATE TABLE tb_analyze_progress (
+  reviewID INT PRIMARY KEY,
+  productID INT NOT NULL,
+  analyzed_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+  FOREIGN KEY (productID) REFERENCES tb_products(ID)
+);
+
+-- 이미 분석 결과가 있는 리뷰는 완료로 기록
+INSERT IGNORE INTO tb_analyze_progress (reviewID, productID)
+SELECT reviewID, MIN(productID)
+FROM tb_analyze
+GROUP BY reviewID;
@@ -0,0 +1,17 @@
+-- LLM 분석 작업 큐 (여러 analyzer 컨테이너가 나눠서 처리)
+-- pending -> running(lease_until까지 worker가 점유) -> done / failed
+-- lease_until이 지난 running 작업은 다른 worker가 다시 가져감 (죽은 worker 작업 회수)
+CREATE TABLE tb_analyze_queue (
+  reviewID INT PRIMARY KEY,
+  productID INT NOT NULL,
+  status VARCHAR(10) NOT NULL DEFAULT 'pending',
+  attempts INT NOT NULL DEFAULT 0,
+  worker VARCHAR(64),
+  lease_until DATETIME,
+  last_error VARCHAR(255),
+  enqueued_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+
+  INDEX idx_analyze_queue_claim (status, lease_until),
+  FOREIGN KEY (productID) REFERENCES tb_products(ID)
+);
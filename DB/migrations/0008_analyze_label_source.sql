@@ -0,0 +1,8 @@
+-- 분석 결과(tb_analyze)의 라벨 출처
+-- llm: LLM(또는 LLM 결과 캐시)이 붙인 결과, local: 로컬 분류기(analyzer/cascade.py)가 붙인 결과
+-- backfill: 이 마이그레이션 전에 저장된 행 (감성은 LLM 결과지만 카테고리 연결은 0003의 LIKE 백필일 수 있음)
+-- 로컬 분류기는 자기 결과를 다시 학습하지 않도록 이 값으로 학습 데이터를 고름
+ALTER TABLE tb_analyze ADD COLUMN source VARCHAR(10) NOT NULL DEFAULT 'backfill';
+
+-- 기존 행은 backfill 로 남기고 새로 저장하는 행의 기본값은 llm
+ALTER TABLE tb_analyze ALTER COLUMN source SET DEFAULT 'llm';
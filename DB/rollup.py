@@ -0,0 +1,7 @@
+from db.db import rebuild_rollups
+
+# 요약 테이블 전체 재계산 (백필용)
+# python -m db.rollup
+# 수집/분석 저장(파이프라인, worker)이 돌고 있지 않을 때 실행
+if __name__ == "__main__":
+    rebuild_rollups()
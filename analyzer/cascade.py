@@ -0,0 +1,231 @@
+from db.db import get_conn, placeholders
+from analyzer.ohou_LLM import split_sentences
+from monitor.metrics import metrics
+from collections import Counter
+import random
+import numpy as np
+
+
+# 문자 n-gram 추출 (공백은 하나로 정리)
+def char_ngrams(text, ngram_range=(1, 3)):
+    text = " ".join(text.split())
+    grams = []
+    for n in range(ngram_range[0], ngram_range[1] + 1):
+        grams.extend(text[i:i + n] for i in range(len(text) - n + 1))
+    return grams
+
+
+# 문자 n-gram 다항 나이브 베이즈 분류기 (NumPy)
+class NaiveBayesClassifier:
+    def __init__(self, ngram_range=(1, 3), alpha=0.5, min_count=2):
+        self.ngram_range = ngram_range
+        self.alpha = alpha
+        self.min_count = min_count
+        self.classes = []
+        self.vocab = {}
+
+    def fit(self, texts, labels):
+        self.classes = sorted(set(labels))
+        class_index = {c: i for i, c in enumerate(self.classes)}
+
+        docs = [char_ngrams(text, self.ngram_range) for text in texts]
+        gram_counts = Counter(g for grams in docs for g in grams)
+        self.vocab = {g: i for i, g in enumerate(g for g, c in gram_counts.items() if c >= self.min_count)}
+
+        counts = np.zeros((len(self.classes), len(self.vocab)))
+        class_counts = np.zeros(len(self.classes))
+        for grams, label in zip(docs, labels):
+            ci = class_index[label]
+            class_counts[ci] += 1
+            idx = [self.vocab[g] for g in grams if g in self.vocab]
+            np.add.at(counts[ci], idx, 1)
+
+        self.class_log_prior = np.log(class_counts / class_counts.sum())
+        smoothed = counts + self.alpha
+        self.feature_log_prob = np.log(smoothed / smoothed.sum(axis=1, keepdims=True))
+        return self
+
+    # 가장 확률 높은 클래스와 그 확률
+    def predict(self, text):
+        idx = [self.vocab[g] for g in char_ngrams(text, self.ngram_range) if g in self.vocab]
+        log_prob = self.class_log_prior + self.feature_log_prob[:, idx].sum(axis=1)
+        prob = np.exp(log_prob - log_prob.max())
+        prob /= prob.sum()
+        best = int(prob.argmax())
+        return self.classes[best], float(prob[best])
+
+
+# 카테고리 없음 클래스 (LLM 응답과 같은 표기)
+NO_CATEGORY = "None"
+
+
+# 학습 데이터: 문장별 감성 (tb_analyze)
+# 로컬 분류기가 저장한 행(source='local')은 빼서 자기 결과를 다시 학습하지 않음
+# backfill 행(0008 이전)도 감성은 LLM 결과라서 포함
+def load_sentiment_samples():
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT sentence, sentiment FROM tb_analyze
+                WHERE sentiment IN ('긍정', '부정') AND source IN ('llm', 'backfill')
+            """)
+            return cur.fetchall()
+
+
+# 학습 데이터: 문장별 카테고리 (tb_analyze_keywords에 저장된 LLM 분류 결과)
+# LLM이 붙인 행(source='llm')만 사용 (backfill 행의 카테고리는 0003의 LIKE 백필일 수 있음)
+def load_category_samples():
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT a.sentence, MIN(c.category)
+                FROM tb_analyze_keywords ak
+                JOIN tb_analyze a ON a.analyzeID = ak.analyzeID
+                JOIN tb_categories c ON c.categoryID = ak.categoryID
+                WHERE a.source = 'llm'
+                GROUP BY a.analyzeID, a.sentence
+                HAVING COUNT(DISTINCT ak.categoryID) = 1
+            """)
+            return cur.fetchall()
+
+
+# 학습 데이터: 카테고리 없는 문장 (최근 분석 완료된 리뷰 limit개)
+# 카테고리 없는 문장은 tb_analyze에 저장하지 않으므로 리뷰를 다시 문장으로 나눠서 tb_analyze에 없는 문장을 찾음
+# 로컬 분류기는 카테고리 없음을 채택하지 않으므로 (classify) 여기 문장은 모두 LLM 결과
+def load_uncategorized_samples(limit=2000):
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT r.reviewID, r.comment
+                FROM tb_analyze_progress p
+                JOIN tb_reviews r ON r.reviewID = p.reviewID
+                ORDER BY p.reviewID DESC
+                LIMIT %s
+            """, (limit,))
+            reviews = cur.fetchall()
+            if not reviews:
+                return []
+            review_ids = [rid for rid, _ in reviews]
+            cur.execute(
+                f"SELECT reviewID, sentence FROM tb_analyze WHERE reviewID IN ({placeholders(review_ids)})",
+                review_ids,
+            )
+            categorized = set(cur.fetchall())
+    return [
+        (sent, NO_CATEGORY)
+        for rid, comment in reviews
+        for sent in split_sentences(comment or "")
+        if (rid, sent) not in categorized
+    ]
+
+
+# 카테고리별 키워드 사전 (많이 나온 순)
+def load_keyword_vocab():
+    vocab = {}
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT c.category, k.keyword, SUM(k.count) AS cnt
+                FROM tb_keywords k
+                JOIN tb_categories c ON c.categoryID = k.categoryID
+                GROUP BY c.category, k.keyword
+                ORDER BY cnt DESC
+            """)
+            for category, keyword, _ in cur.fetchall():
+                vocab.setdefault(category, []).append(keyword)
+    return vocab
+
+
+# LLM 앞단의 로컬 분류기
+# - 카테고리/감성 둘 다 threshold 이상으로 확신하고, 문장에서 해당 카테고리 키워드를 찾으면 로컬 결과 사용
+# - 카테고리 없음(NO_CATEGORY)으로 예측하거나 나머지는 LLM으로 넘김 (로컬에서는 판단 보류)
+# - 로컬 결과는 source='local' 로 저장돼서 다음 학습에서 빠짐
+# - audit_rate 비율만큼은 로컬 결과가 있어도 LLM에 보내서 일치율 측정
+class LocalCascade:
+    def __init__(self, category_model, sentiment_model, keyword_vocab, threshold=0.95, audit_rate=0.05):
+        self.category_model = category_model
+        self.sentiment_model = sentiment_model
+        self.keyword_vocab = keyword_vocab
+        self.threshold = threshold
+        self.audit_rate = audit_rate
+        self.seen = 0
+        self.accepted = 0
+        self.audited = 0
+        self.category_agree = 0
+        self.sentiment_agree = 0
+
+    @classmethod
+    def from_db(cls, threshold=0.95, audit_rate=0.05, min_samples=200, uncategorized_reviews=2000):
+        category_samples = load_category_samples()
+        uncategorized_samples = load_uncategorized_samples(uncategorized_reviews)
+        sentiment_samples = load_sentiment_samples()
+        if len(category_samples) < min_samples or len(sentiment_samples) < min_samples:
+            print(f"로컬 분류기 학습 데이터 부족 (카테고리 {len(category_samples)}개, 감성 {len(sentiment_samples)}개)")
+            return None
+
+        category_model = NaiveBayesClassifier().fit(*zip(*list(category_samples) + uncategorized_samples))
+        sentiment_model = NaiveBayesClassifier().fit(*zip(*sentiment_samples))
+        print(f"로컬 분류기 학습 완료 (카테고리 {len(category_samples)}개, 카테고리 없음 {len(uncategorized_samples)}개, "
+              f"감성 {len(sentiment_samples)}개)")
+        return cls(category_model, sentiment_model, load_keyword_vocab(), threshold, audit_rate)
+
+    # 문장에 들어있는 카테고리 키워드 (최대 5개)
+    def find_keywords(self, sent, category):
+        found = []
+        for keyword in self.keyword_vocab.get(category, []):
+            if keyword in sent and keyword not in found:
+                found.append(keyword)
+                if len(found) == 5:
+                    break
+        return found
+
+    # 확신하면 결과 dict, 아니면 None
+    def classify(self, sent):
+        category, category_prob = self.category_model.predict(sent)
+        if category == NO_CATEGORY:
+            return None
+        sentiment, sentiment_prob = self.sentiment_model.predict(sent)
+        if category_prob < self.threshold or sentiment_prob < self.threshold:
+            return None
+        keywords = self.find_keywords(sent, category)
+        if not keywords:
+            return None
+        return {"category": category, "keywords": keywords, "sentiment": sentiment, "source": "local"}
+
+    # 문장들을 로컬 결과 / LLM으로 보낼 문장으로 나누기
+    # 반환: (로컬 결과 {문장ID: 결과}, LLM으로 보낼 문장, 검증용 로컬 결과 {문장ID: 결과})
+    def split(self, items):
+        accepted, pending, audit = {}, [], {}
+        for item in items:
+            self.seen += 1
+            result = self.classify(item[3])
+            if result is None:
+                pending.append(item)
+                metrics.inc("cascade_decisions", result="llm")
+            elif random.random() < self.audit_rate:
+                audit[item[0]] = result
+                pending.append(item)
+                metrics.inc("cascade_decisions", result="audit")
+            else:
+                self.accepted += 1
+                accepted[item[0]] = result
+                metrics.inc("cascade_decisions", result="local")
+        return accepted, pending, audit
+
+    # 검증 대상의 로컬 결과와 LLM 결과 비교
+    def record(self, audit, results):
+        for sid, local in audit.items():
+            llm_result = results.get(sid)
+            if llm_result is None:
+                continue
+            self.audited += 1
+            self.category_agree += local["category"] == llm_result["category"]
+            self.sentiment_agree += local["sentiment"] == llm_result["sentiment"]
+
+    def report(self):
+        accept_rate = self.accepted / self.seen if self.seen else 0.0
+        print(f"로컬 분류기 채택 {self.accepted}/{self.seen}개 ({accept_rate:.1%})")
+        if self.audited:
+            print(f"로컬 분류기 LLM 일치율 (검증 {self.audited}개): "
+                  f"카테고리 {self.category_agree / self.audited:.1%}, "
+                  f"감성 {self.sentiment_agree / self.audited:.1%}")
@@ -0,0 +1,92 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from monitor.metrics import metrics
+
+
+# 캐시 키용 문장 정규화 (유니코드 정규화, 공백 정리, 소문자)
+def normalize_sentence(sentence):
+    sentence = unicodedata.normalize("NFKC", sentence)
+    return re.sub(r"\s+", " ", sentence).strip().lower()
+
+
+# LLM 분석 결과 캐시 (로컬 SQLite 파일)
+# - 키: 정규화된 문장 + 프롬프트 버전 + 모델명의 sha256
+# - max_entries를 넘으면 가장 오래 안 쓰인 항목부터 삭제
+class LLMCache:
+    def __init__(self, path="llm_cache.sqlite3", max_entries=200000, evict_every=1000):
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.lock = threading.Lock()
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        self.hits = 0
+        self.misses = 0
+        self.puts = 0
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache (last_used)")
+
+    @staticmethod
+    def make_key(sentence, prompt_version, model):
+        raw = "\x1f".join([prompt_version, model, normalize_sentence(sentence)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM llm_cache WHERE key=?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                metrics.inc("llm_cache_lookups", result="miss")
+                return None
+            self.hits += 1
+            metrics.inc("llm_cache_lookups", result="hit")
+            self.conn.execute("UPDATE llm_cache SET last_used=? WHERE key=?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key, value):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, last_used) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), time.time()),
+            )
+            self.puts += 1
+            if self.puts % self.evict_every == 0:
+                self._evict()
+
+    # 크기 제한 초과분 삭제 (LRU)
+    def _evict(self):
+        count = self.conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        if count > self.max_entries:
+            self.conn.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    # 실행 끝에 히트/미스 출력하고 크기 정리
+    def report(self):
+        with self.lock:
+            self._evict()
+        stats = self.stats()
+        print(f"LLM 캐시 히트 {stats['hits']}개, 미스 {stats['misses']}개 (히트율 {stats['hit_rate']:.1%})")
+        return stats
@@ -1,52 +1,117 @@
-from db.db import dbcon
+from db.db import get_conn, TimedSSCursor
+from analyzer.llm_cache import LLMCache
+from monitor.metrics import metrics
+import asyncio
+import json
+import os
+import random
 import re
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
+import time
 from tqdm import tqdm
 
+# langchain / openai 는 import 만 해도 오래 걸려서 처음 LLM을 쓸 때 불러옴 (get_chains)
+# 크롤링/전처리만 하는 실행은 LLM 관련 모듈을 불러오지 않음
 
-## 분석 돌릴 리뷰 전처리
-def clean_reviews(exclude_texts=None):
+
+# 별점 선택 시 자동으로 들어가는 문구 (분석 제외)
+EXCLUDE_TEXTS = [
+    "최고예요",
+    "마음에 들어요",
+    "보통이에요",
+    "별로예요",
+    "매우 아쉬워요",
+]
+
+
+# 분석할 리뷰 조회 SQL + 파라미터
+# - 제외 문구 필터는 SQL에서 처리
+# - incremental=True 면 분석 완료 기록(tb_analyze_progress)이 없는 리뷰만 조회
+# - review_ids 를 주면 그 리뷰들만 조회 (빈 목록이면 None)
+def clean_reviews_query(exclude_texts=None, incremental=True, review_ids=None):
     if exclude_texts is None:
-        exclude_texts = [
-            "최고예요",
-            "마음에 들어요",
-            "보통이에요",
-            "별로예요",
-            "매우 아쉬워요",
-        ]
-
-    conn = dbcon()
-    inserted_reviews = []
-
-    with conn.cursor() as cur:
-        # 리뷰 + 상품명 가져오기
-        cur.execute(
-            """
-            SELECT r.reviewID, r.comment, p.ID
-            FROM tb_reviews r
-            JOIN tb_products p ON r.goodsID = p.ID
+        exclude_texts = EXCLUDE_TEXTS
+
+    sql = """
+        SELECT r.reviewID, r.comment, p.ID
+        FROM tb_reviews r
+        JOIN tb_products p ON r.goodsID = p.ID
+        WHERE r.comment IS NOT NULL
+    """
+    params = list(exclude_texts)
+    if exclude_texts:
+        sql += f" AND r.comment NOT IN ({', '.join(['%s'] * len(exclude_texts))})"
+    if review_ids is not None:
+        if not review_ids:
+            return None
+        sql += f" AND r.reviewID IN ({', '.join(['%s'] * len(review_ids))})"
+        params.extend(review_ids)
+    if incremental:
+        sql += """
+          AND NOT EXISTS (
+              SELECT 1 FROM tb_analyze_progress ap WHERE ap.reviewID = r.reviewID
+          )
         """
-        )
-        result = cur.fetchall()
+    return sql, params
+
+
+## 분석 돌릴 리뷰 전처리 (스트리밍)
+# - 서버 사이드 커서로 chunk_size 개씩 가져와서 메모리 사용량 일정하게 유지
+# - 다 읽을 때까지 연결을 잡고 있으므로 소비자가 오래 멈추지 않을 때만 사용
+#   (읽지 않고 net_write_timeout 이 지나면 서버가 연결을 끊음, 오래 걸리면 iter_clean_review_pages)
+def iter_clean_reviews(exclude_texts=None, incremental=True, chunk_size=1000, review_ids=None):
+    query = clean_reviews_query(exclude_texts, incremental, review_ids)
+    if query is None:
+        return
+    sql, params = query
 
-        for review_id, review_text, product_ID in result:
-            if review_text in exclude_texts:
-                continue
-            inserted_reviews.append((review_id, review_text, product_ID))
+    with get_conn() as conn:
+        with conn.cursor(TimedSSCursor) as cur:
+            cur.execute(sql, params)
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for review_id, review_text, product_ID in rows:
+                    yield review_id, review_text, product_ID
 
+
+## 분석 돌릴 리뷰를 page_size 개씩 목록으로 (reviewID 기준 keyset 페이지네이션)
+# 페이지마다 일반 커서로 다 읽고 연결을 반납한 뒤 넘겨줌
+# 소비자가 페이지 하나를 오래 처리해도 열린 결과셋/빌린 연결이 없음
+def iter_clean_review_pages(exclude_texts=None, incremental=True, page_size=1000):
+    sql, params = clean_reviews_query(exclude_texts, incremental)
+    sql += " AND r.reviewID > %s ORDER BY r.reviewID LIMIT %s"
+    last_id = 0
+    while True:
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, [*params, last_id, page_size])
+                page = list(cur.fetchall())
+        if not page:
+            return
+        last_id = page[-1][0]
+        yield page
+        if len(page) < page_size:
+            return
+
+
+## 분석 돌릴 리뷰 전처리
+def clean_reviews(exclude_texts=None, incremental=True, chunk_size=1000, review_ids=None):
+    inserted_reviews = list(iter_clean_reviews(exclude_texts, incremental, chunk_size, review_ids))
     print(f"제거완료, 분석할 리뷰 수 {len(inserted_reviews)}개")
     return inserted_reviews
 
 
 # 리뷰 카테고리, 키워드, 감성 분류
-dbcon()
-llm = ChatOpenAI(model="gpt-4o-mini")
+MODEL_NAME = "gpt-4o-mini"
+
+# 프롬프트를 바꾸면 버전을 올려서 이전 캐시 결과를 쓰지 않도록 함
+# (통합 체인과 배치 체인은 같은 결과 형식이라 같은 버전을 사용)
+PROMPT_VERSION = "fused-v1"
+LEGACY_PROMPT_VERSION = "legacy-v1"
 
 # 문장별 카테고리 분류
-category_prompt = ChatPromptTemplate.from_template(
-    """
+CATEGORY_TEMPLATE = """
     You are a classification assistant.
     Classify the given sentence into one of the following categories:
 
@@ -69,12 +134,9 @@ category_prompt = ChatPromptTemplate.from_template(
       "category": "사용감"
     }}
     """
-)
-category_chain = category_prompt | llm | JsonOutputParser()
 
 # 키워드 추출
-keyword_prompt = ChatPromptTemplate.from_template(
-    """
+KEYWORD_TEMPLATE = """
     Extract 1-5 **nouns only** from the following sentence. 
     Exclude general emotion words like "좋아요", "만족", "최고".
     If no obvious product-related noun exists, pick the most meaningful noun in the sentence.
@@ -90,12 +152,9 @@ keyword_prompt = ChatPromptTemplate.from_template(
       "keywords": ["배송"]
     }}
     """
-)
-keyword_chain = keyword_prompt | llm | JsonOutputParser()
 
 # 감성 분석 프롬프트
-sentiment_prompt = ChatPromptTemplate.from_template(
-    """
+SENTIMENT_TEMPLATE = """
     Determine the sentiment of the given sentence.
     Return "긍정", "부정".
     Return result in strict JSON format.
@@ -110,43 +169,550 @@ sentiment_prompt = ChatPromptTemplate.from_template(
       "sentiment": "긍정"
     }}
     """
-)
-sentiment_chain = sentiment_prompt | llm | JsonOutputParser()
 
 
-# 실행
-def analyze_reviews(inserted_reviews):
-    all_results = []
-
-    for rid, rtext, productID in tqdm(inserted_reviews, desc="리뷰 분석 진행"):
-        # 리뷰를 문장 단위로 분리
-        sentences = re.split(r"(?<=[.!?])[\s\n]+", rtext)
-        sentences = [s.strip() for s in sentences if s.strip()]  # 빈문장 제거
-
-        for sent in tqdm(sentences, desc=f"리뷰ID {rid}문장 분석", leave=False):
-            if not sent.strip():
-                continue
-
-            # 카테고리 분류
-            category_result = category_chain.invoke({"sentence": sent})
-
-            if category_result["category"] != "None":  # 카테고리가 있는 문장만
-                # 키워드 추출
-                kw_result = keyword_chain.invoke({"sentence": sent})
-
-                # 감성 분석
-                sentiment_result = sentiment_chain.invoke({"sentence": sent})
-
-                all_results.append(
-                    {
-                        "productID": productID,
-                        "review_id": rid,
-                        "sentence": sent,
-                        "category": category_result["category"],
-                        "keywords": kw_result["keywords"],
-                        "sentiment": sentiment_result["sentiment"],
-                    }
-                )
-
-    print(f"LLM 분석 완료! 총 {len(all_results)}개의 문장이 처리되었습니다.")
+# 카테고리 + 키워드 + 감성을 한 번에 분석 (문장을 다시 출력하지 않음)
+ANALYSIS_TEMPLATE = """
+    You are a review analysis assistant.
+    For the given sentence, return its category, keywords and sentiment.
+
+    Categories:
+    - 배송: 배송 속도, 포장, 상태와 관련된 내용
+    - 사용감: 사용 후 체감, 촉감, 착용감, 사용 경험
+    - 사이즈: 크기, 길이, 넓이
+    - 디자인: 색상, 모양, 스타일, 미적 요소
+    - 품질: 내구성, 마감, 소재, 제품 완성도
+
+    Rules:
+    - category: one of the categories above. If no category matches, return "None".
+    - keywords: 1-5 **nouns only** from the sentence. Exclude general emotion words like "좋아요", "만족", "최고".
+      If no obvious product-related noun exists, pick the most meaningful noun in the sentence.
+    - sentiment: "긍정" or "부정".
+    - Do not repeat the sentence in the output.
+    - Return result in **strict JSON format**.
+    - Do not include any backslashes (`\`) or escape sequences.
+
+    Sentence: "{sentence}"
+
+    Output:
+    {{
+      "category": "사용감",
+      "keywords": ["배송"],
+      "sentiment": "긍정"
+    }}
+    """
+
+
+# 통합 체인 응답 정리
+def fused_result(result):
+    return {
+        "category": result.get("category", "None"),
+        "keywords": result.get("keywords", []),
+        "sentiment": result.get("sentiment"),
+    }
+
+
+NO_CATEGORY = {"category": "None", "keywords": [], "sentiment": None}
+
+
+# 문장 하나 분석 -> {"category", "keywords", "sentiment"}
+# fused=True 면 한 번의 호출, False 면 기존 3단계 체인 사용
+def analyze_sentence(sent, fused=True):
+    chains = get_chains()
+    if fused:
+        return fused_result(chains["analysis"].invoke({"sentence": sent}))
+
+    # 카테고리 분류
+    category_result = chains["category"].invoke({"sentence": sent})
+    if category_result["category"] == "None":
+        return NO_CATEGORY
+
+    # 키워드 추출
+    kw_result = chains["keyword"].invoke({"sentence": sent})
+
+    # 감성 분석
+    sentiment_result = chains["sentiment"].invoke({"sentence": sent})
+
+    return {
+        "category": category_result["category"],
+        "keywords": kw_result["keywords"],
+        "sentiment": sentiment_result["sentiment"],
+    }
+
+
+# 일시적인 오류 (rate limit, 네트워크, 서버 오류)는 재시도
+def transient_errors():
+    import openai
+
+    return (
+        openai.RateLimitError,
+        openai.APIConnectionError,
+        openai.InternalServerError,
+    )
+
+
+# 지수 백오프 + full jitter 재시도
+async def with_retry(make_call, retries=5, base_delay=1.0, max_delay=30.0):
+    for attempt in range(retries + 1):
+        try:
+            return await make_call()
+        except transient_errors() as e:
+            if attempt == retries:
+                raise
+            metrics.inc("llm_retries", error=type(e).__name__)
+            await asyncio.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** attempt)))
+
+
+# analyze_sentence 비동기 버전
+async def aanalyze_sentence(sent, fused=True):
+    chains = get_chains()
+    if fused:
+        result = await with_retry(lambda: chains["analysis"].ainvoke({"sentence": sent}))
+        return fused_result(result)
+
+    category_result = await with_retry(lambda: chains["category"].ainvoke({"sentence": sent}))
+    if category_result["category"] == "None":
+        return NO_CATEGORY
+
+    # 키워드와 감성은 서로 독립이라 동시에 요청
+    kw_result, sentiment_result = await asyncio.gather(
+        with_retry(lambda: chains["keyword"].ainvoke({"sentence": sent})),
+        with_retry(lambda: chains["sentiment"].ainvoke({"sentence": sent})),
+    )
+    return {
+        "category": category_result["category"],
+        "keywords": kw_result["keywords"],
+        "sentiment": sentiment_result["sentiment"],
+    }
+
+
+# 카테고리 설명 (tb_categories에 새 카테고리가 추가되면 이름만 프롬프트에 들어감)
+CATEGORY_DESCRIPTIONS = {
+    "배송": "배송 속도, 포장, 상태와 관련된 내용",
+    "사용감": "사용 후 체감, 촉감, 착용감, 사용 경험",
+    "사이즈": "크기, 길이, 넓이",
+    "디자인": "색상, 모양, 스타일, 미적 요소",
+    "품질": "내구성, 마감, 소재, 제품 완성도",
+}
+
+category_names = None
+
+
+# tb_categories에서 현재 카테고리 목록 가져오기 (한 번만 조회)
+def load_categories():
+    global category_names
+    if category_names is None:
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT category FROM tb_categories ORDER BY categoryID")
+                category_names = [row[0] for row in cur.fetchall()]
+    return category_names
+
+
+def category_block():
+    lines = []
+    for name in load_categories():
+        desc = CATEGORY_DESCRIPTIONS.get(name)
+        lines.append(f"- {name}: {desc}" if desc else f"- {name}")
+    return "\n".join(lines)
+
+
+# 여러 문장을 한 번에 분석
+BATCH_TEMPLATE = """
+    You are a review analysis assistant.
+    For each sentence in the input JSON array, return its category, keywords and sentiment.
+
+    Categories:
+    {categories}
+
+    Rules:
+    - category: one of the categories above. If no category matches, return "None".
+    - keywords: 1-5 **nouns only** from the sentence. Exclude general emotion words like "좋아요", "만족", "최고".
+      If no obvious product-related noun exists, pick the most meaningful noun in the sentence.
+    - sentiment: "긍정" or "부정".
+    - Keep the "id" of each sentence exactly as given. Do not repeat the sentence in the output.
+    - Return one object per input sentence as a **strict JSON array**.
+    - Do not include any backslashes (`\`) or escape sequences.
+
+    Input:
+    {sentences}
+
+    Output:
+    [
+      {{"id": "123-0", "category": "사용감", "keywords": ["배송"], "sentiment": "긍정"}}
+    ]
+    """
+
+chains = None
+
+
+# LLM 클라이언트 + 체인 (처음 호출할 때 한 번만 생성, 걸린 시간은 llm_init_seconds)
+def get_chains():
+    global chains
+    if chains is None:
+        started = time.perf_counter()
+        from langchain_openai import ChatOpenAI
+        from langchain.prompts import ChatPromptTemplate
+        from langchain_core.output_parsers import JsonOutputParser
+        from monitor.llm_callback import LLMMetricsHandler
+
+        llm = ChatOpenAI(model=MODEL_NAME, callbacks=[LLMMetricsHandler(MODEL_NAME)])
+        templates = {
+            "category": CATEGORY_TEMPLATE,
+            "keyword": KEYWORD_TEMPLATE,
+            "sentiment": SENTIMENT_TEMPLATE,
+            "analysis": ANALYSIS_TEMPLATE,
+            "batch": BATCH_TEMPLATE,
+        }
+        chains = {
+            name: ChatPromptTemplate.from_template(template) | llm | JsonOutputParser()
+            for name, template in templates.items()
+        }
+        metrics.set("llm_init_seconds", round(time.perf_counter() - started, 3))
+    return chains
+
+
+# 리뷰를 문장 단위로 분리
+def split_sentences(rtext):
+    sentences = re.split(r"(?<=[.!?])[\s\n]+", rtext)
+    return [s.strip() for s in sentences if s.strip()]  # 빈문장 제거
+
+
+# 리뷰 목록 -> (문장ID, productID, reviewID, 문장)
+# 문장ID는 "리뷰ID-문장순번" 이라 재시도해도 바뀌지 않음
+def iter_sentences(inserted_reviews):
+    for rid, rtext, productID in inserted_reviews:
+        for i, sent in enumerate(split_sentences(rtext)):
+            yield f"{rid}-{i}", productID, rid, sent
+
+
+# 대략적인 토큰 수 (한글은 글자당 1토큰 정도, JSON 포장 비용 포함)
+def estimate_tokens(text):
+    return len(text) + 12
+
+
+# 문장들을 batch_size 개, token_budget 토큰 이하로 묶기
+def make_batches(items, batch_size=20, token_budget=1500):
+    batch, used = [], 0
+    for item in items:
+        cost = estimate_tokens(item[3])
+        if batch and (len(batch) >= batch_size or used + cost > token_budget):
+            yield batch
+            batch, used = [], 0
+        batch.append(item)
+        used += cost
+    if batch:
+        yield batch
+
+
+# 배치 응답 한 항목이 올바른지 확인
+def valid_result(result):
+    return (
+        isinstance(result, dict)
+        and (result.get("category") == "None" or result.get("category") in load_categories())
+        and isinstance(result.get("keywords", []), list)
+        and (result.get("category") == "None" or result.get("sentiment") in ("긍정", "부정"))
+    )
+
+
+def batch_input(batch):
+    payload = json.dumps([{"id": sid, "sentence": sent} for sid, _, _, sent in batch], ensure_ascii=False)
+    return {"categories": category_block(), "sentences": payload}
+
+
+# 배치 응답 -> {문장ID: 결과}, 응답에서 빠지거나 잘못된 문장은 결과에 없음
+def parse_batch_output(output):
+    if not isinstance(output, list):
+        return {}
+
+    results = {}
+    for result in output:
+        if valid_result(result) and "id" in result:
+            results[str(result["id"])] = {
+                "category": result["category"],
+                "keywords": result.get("keywords", []),
+                "sentiment": result.get("sentiment"),
+            }
+    return results
+
+
+# 배치 하나 분석
+def analyze_batch(batch):
+    from langchain_core.exceptions import OutputParserException
+
+    try:
+        output = get_chains()["batch"].invoke(batch_input(batch))
+    except OutputParserException:
+        return {}
+    return parse_batch_output(output)
+
+
+# analyze_batch 비동기 버전
+async def aanalyze_batch(batch):
+    from langchain_core.exceptions import OutputParserException
+
+    try:
+        output = await with_retry(lambda: get_chains()["batch"].ainvoke(batch_input(batch)))
+    except OutputParserException:
+        return {}
+    return parse_batch_output(output)
+
+
+# source: 라벨 출처 (로컬 분류기 결과는 "local", LLM/캐시 결과는 "llm")
+def to_row(productID, rid, sent, result):
+    return {
+        "productID": productID,
+        "review_id": rid,
+        "sentence": sent,
+        "category": result["category"],
+        "keywords": result["keywords"],
+        "sentiment": result["sentiment"],
+        "source": result.get("source", "llm"),
+    }
+
+
+llm_cache = None
+
+
+# 분석 결과 캐시 (LLM_CACHE_PATH, LLM_CACHE_SIZE 환경변수로 설정)
+def get_cache():
+    global llm_cache
+    if llm_cache is None:
+        llm_cache = LLMCache(
+            path=os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite3"),
+            max_entries=int(os.getenv("LLM_CACHE_SIZE", "200000")),
+        )
+    return llm_cache
+
+
+def cache_key(sent, fused=True):
+    return LLMCache.make_key(sent, PROMPT_VERSION if fused else LEGACY_PROMPT_VERSION, MODEL_NAME)
+
+
+# 캐시 -> 로컬 분류기 순서로 결과를 찾고, 못 찾은 문장만 pending으로 분리
+# 반환: (결과 {문장ID: 결과}, LLM으로 보낼 문장, 로컬 분류기 검증 대상)
+def resolve_local(items, cache=None, fused=True, cascade=None):
+    results, pending = {}, []
+    for item in items:
+        result = cache.get(cache_key(item[3], fused)) if cache else None
+        if result is None:
+            pending.append(item)
+        else:
+            results[item[0]] = result
+
+    audit = {}
+    if cascade:
+        accepted, pending, audit = cascade.split(pending)
+        results.update(accepted)
+    return results, pending, audit
+
+
+# 문장 순서대로 결과 행 만들기 (카테고리가 있는 문장만)
+def collect_rows(items, results):
+    rows = []
+    for sid, productID, rid, sent in items:
+        result = results[sid]
+        if result["category"] != "None":
+            rows.append(to_row(productID, rid, sent, result))
+    return rows
+
+
+# 리뷰별 완료 추적 (체크포인트)
+# 리뷰의 모든 문장 결과가 나오면 완료로 보고,
+# every 개 리뷰가 모이면 on_checkpoint(결과 행, done_reviews=완료된 (reviewID, productID) 목록) 호출
+# background=True (비동기 실행 중) 면 on_checkpoint는 스레드에서 순서대로 실행하고 drain()으로 대기
+class Checkpoint:
+    def __init__(self, on_checkpoint=None, every=50):
+        self.on_checkpoint = on_checkpoint
+        self.every = every
+        self.review_items = {}
+        self.remaining = {}
+        self.rows = []
+        self.done = []
+        self.background = False
+        self.saving = None  # 마지막 저장 작업 (background)
+
+    # 리뷰와 문장 등록 (results에 이미 있는 문장은 바로 완료 처리)
+    def track(self, inserted_reviews, items, results):
+        for rid, _, productID in inserted_reviews:
+            self.review_items.setdefault((rid, productID), [])
+        for item in items:
+            self.review_items[(item[2], item[1])].append(item)
+        for rid, _, productID in inserted_reviews:
+            key = (rid, productID)
+            if key not in self.remaining:
+                self.remaining[key] = len(self.review_items[key])
+                if not self.remaining[key]:  # 문장이 없는 리뷰
+                    self.finish(key, results)
+        for item in items:
+            if item[0] in results:
+                self.resolve(item, results)
+
+    def resolve(self, item, results):
+        key = (item[2], item[1])
+        self.remaining[key] -= 1
+        if self.remaining[key] == 0:
+            self.finish(key, results)
+
+    def finish(self, key, results):
+        self.rows.extend(collect_rows(self.review_items.pop(key), results))
+        self.done.append(key)
+        if len(self.done) >= self.every:
+            self.flush()
+
+    def flush(self):
+        if self.saving and self.saving.done():
+            self.saving.result()  # 앞 저장이 실패했으면 여기서 예외
+        if self.on_checkpoint and self.done:
+            if self.background:
+                self.saving = asyncio.ensure_future(self.save_after(self.saving, self.rows, self.done))
+            else:
+                self.on_checkpoint(self.rows, done_reviews=self.done)
+        self.rows, self.done = [], []
+
+    # 앞 저장이 끝난 뒤 스레드에서 저장 (DB 저장 중에도 이벤트 루프는 LLM 요청을 계속 처리)
+    async def save_after(self, previous, rows, done):
+        if previous:
+            await previous
+        await asyncio.to_thread(self.on_checkpoint, rows, done_reviews=done)
+
+    # 밀린 저장이 끝날 때까지 대기
+    async def drain(self):
+        if self.saving:
+            saving, self.saving = self.saving, None
+            await saving
+
+
+# 배치 분석 실행: 실패하거나 빠진 문장만 한 문장씩 다시 분석
+def analyze_reviews_batched(inserted_reviews, batch_size=20, token_budget=1500, cache=None, cascade=None,
+                            checkpoint=None):
+    checkpoint = checkpoint or Checkpoint()
+    items = list(iter_sentences(inserted_reviews))
+    results, pending, audit = resolve_local(items, cache, cascade=cascade)
+    checkpoint.track(inserted_reviews, items, results)
+    retried = 0
+
+    for batch in tqdm(list(make_batches(pending, batch_size, token_budget)), desc="리뷰 배치 분석 진행"):
+        batch_results = analyze_batch(batch)
+        for item in batch:
+            sid, _, _, sent = item
+            result = batch_results.get(sid)
+            if result is None:
+                retried += 1
+                metrics.inc("llm_batch_fallbacks")
+                result = analyze_sentence(sent)
+            results[sid] = result
+            if cache:
+                cache.put(cache_key(sent), result)
+            checkpoint.resolve(item, results)
+
+    if cascade:
+        cascade.record(audit, results)
+    all_results = collect_rows(items, results)
+    print(f"LLM 배치 분석 완료! 문장 {len(items)}개 중 {retried}개 단건 재분석, "
+          f"총 {len(all_results)}개의 문장이 처리되었습니다.")
+    return all_results
+
+
+# 비동기 분석 실행: 최대 concurrency 개의 요청을 동시에 보내고 결과는 입력 순서대로 반환
+async def analyze_reviews_async(inserted_reviews, fused=True, batch_size=None, token_budget=1500,
+                                concurrency=8, cache=None, cascade=None, checkpoint=None):
+    checkpoint = checkpoint or Checkpoint()
+    sem = asyncio.Semaphore(concurrency)
+    items = list(iter_sentences(inserted_reviews))
+    results, pending, audit = resolve_local(items, cache, fused, cascade)
+    checkpoint.track(inserted_reviews, items, results)
+    if batch_size:
+        load_categories()  # 이벤트 루프 안에서 DB 조회하지 않도록 미리 로드
+        units = list(make_batches(pending, batch_size, token_budget))
+    else:
+        units = [[item] for item in pending]
+    progress = tqdm(total=len(items), initial=len(items) - len(pending), desc="리뷰 비동기 분석 진행")
+
+    async def run_unit(unit):
+        batch_results = {}
+        if batch_size:
+            async with sem:
+                batch_results = await aanalyze_batch(unit)
+
+        for item in unit:
+            sid, _, _, sent = item
+            result = batch_results.get(sid)
+            if result is None:  # 단건 분석 또는 배치에서 빠진 문장 재분석
+                if batch_size:
+                    metrics.inc("llm_batch_fallbacks")
+                async with sem:
+                    result = await aanalyze_sentence(sent, fused=fused)
+            results[sid] = result
+            if cache:
+                cache.put(cache_key(sent, fused), result)
+            checkpoint.resolve(item, results)
+        progress.update(len(unit))
+
+    checkpoint.background = True  # LLM 요청이 도는 동안 체크포인트 저장이 이벤트 루프를 막지 않도록
+    try:
+        await asyncio.gather(*(run_unit(unit) for unit in units))
+    finally:
+        progress.close()
+        checkpoint.background = False
+        await checkpoint.drain()
+
+    if cascade:
+        cascade.record(audit, results)
+    all_results = collect_rows(items, results)
+    print(f"LLM 비동기 분석 완료! 총 {len(all_results)}개의 문장이 처리되었습니다.")
     return all_results
+
+
+# 실행
+# batch_size를 주면 여러 문장을 한 프롬프트로 묶어서 분석
+# concurrency를 주면 비동기로 여러 요청을 동시에 처리
+# use_cache=True 면 같은 문장은 캐시된 결과를 재사용
+# cascade(LocalCascade)를 주면 로컬 분류기가 확신하는 문장은 LLM을 호출하지 않음
+# on_checkpoint를 주면 리뷰 checkpoint_every 개가 끝날 때마다 결과를 넘김
+# (on_checkpoint=save_analyze_review 면 중간 저장 -> 중간에 멈춰도 다음 실행은 남은 리뷰만 분석)
+def analyze_reviews(inserted_reviews, fused=True, batch_size=None, token_budget=1500, concurrency=None,
+                    use_cache=True, cascade=None, report=True, on_checkpoint=None, checkpoint_every=50):
+    cache = get_cache() if use_cache else None
+    checkpoint = Checkpoint(on_checkpoint, checkpoint_every)
+    try:
+        if concurrency:
+            return asyncio.run(
+                analyze_reviews_async(inserted_reviews, fused, batch_size, token_budget, concurrency,
+                                      cache, cascade, checkpoint)
+            )
+        if batch_size:
+            return analyze_reviews_batched(inserted_reviews, batch_size, token_budget, cache, cascade,
+                                           checkpoint)
+
+        all_results = []
+
+        for review in tqdm(inserted_reviews, desc="리뷰 분석 진행"):
+            rid = review[0]
+            # 리뷰를 문장 단위로 분리
+            items = list(iter_sentences([review]))
+            results, pending, audit = resolve_local(items, cache, fused, cascade)
+            checkpoint.track([review], items, results)
+
+            for item in tqdm(pending, desc=f"리뷰ID {rid}문장 분석", leave=False):
+                sid, _, _, sent = item
+                results[sid] = analyze_sentence(sent, fused=fused)
+                if cache:
+                    cache.put(cache_key(sent, fused), results[sid])
+                checkpoint.resolve(item, results)
+
+            if cascade:
+                cascade.record(audit, results)
+            all_results.extend(collect_rows(items, results))  # 카테고리가 있는 문장만
+
+        print(f"LLM 분석 완료! 총 {len(all_results)}개의 문장이 처리되었습니다.")
+        return all_results
+    finally:
+        # 실패해도 이미 끝난 리뷰는 저장
+        checkpoint.flush()
+        # 스트리밍 파이프라인은 묶음마다 호출하므로 끝에 한 번만 출력 (report=False)
+        if report:
+            if cache:
+                cache.report()
+            if cascade:
+                cascade.report()
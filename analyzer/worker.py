@@ -0,0 +1,124 @@
+import os
+import signal
+import socket
+import threading
+import time
+
+from db.db import (claim_analyze_jobs, extend_analyze_leases, release_analyze_jobs,
+                   save_analyze_review)
+from analyzer.ohou_LLM import iter_clean_reviews, analyze_reviews, get_cache
+from monitor.metrics import metrics
+
+# LLM 분석 worker
+# tb_analyze_queue 에서 작업을 batch_size개씩 가져와 분석하고 결과 저장 + 완료 처리
+# 같은 MySQL을 바라보는 컨테이너를 여러 개 띄우면 작업을 나눠서 처리 (SKIP LOCKED)
+#
+#   python main.py --enqueue                    # 크롤링/전처리 후 분석할 리뷰를 큐에 등록
+#   python main.py worker                       # 큐가 빌 때까지 대기하며 계속 처리
+#   docker run ... ohou-analyzer python main.py worker --exit-when-empty
+# (옵션/마이그레이션/로컬 분류기 준비는 main.py worker 에서 처리)
+#
+# 실행 지표는 METRICS_DIR/worker-{WORKER_NAME 또는 호스트 이름}.prom 에 주기적으로 덮어쓰고 worker 라벨을 붙임
+
+stopping = False
+
+
+# SIGTERM/SIGINT: 지금 배치까지만 끝내고 종료 (컨테이너 정지 시)
+def request_stop(signum, frame):
+    global stopping
+    if stopping:
+        raise KeyboardInterrupt
+    stopping = True
+    print("종료 요청 받음, 현재 배치까지 처리하고 종료합니다.")
+
+
+# 작업 점유용 이름 (프로세스마다 다름)
+def worker_name():
+    return f"{socket.gethostname()}-{os.getpid()}"[:64]
+
+
+# 지표용 worker 이름 (재시작해도 같음: WORKER_NAME 환경변수, 없으면 호스트 이름 = 컨테이너 ID)
+# 리포트 파일(worker-{이름}.prom)과 worker 라벨에 사용
+def worker_id():
+    return os.getenv("WORKER_NAME") or socket.gethostname()
+
+
+# 배치를 처리하는 동안 lease_seconds/3 마다 lease 연장 (LLM 재시도로 배치가 길어져도 뺏기지 않음)
+# 연장에 실패해도 배치는 계속 진행하고, 저장할 때 점유 확인으로 중복 저장을 막음
+def renew_leases(worker, lease_seconds, stop):
+    while not stop.wait(lease_seconds / 3):
+        try:
+            extend_analyze_leases(worker, lease_seconds)
+        except Exception as e:
+            metrics.inc("worker_lease_renew_failures", error=type(e).__name__)
+            print(f"lease 연장 실패 ({type(e).__name__}: {e})")
+
+
+# 가져온 작업 하나(batch) 처리
+# 체크포인트마다 결과를 저장하고(완료 처리 포함), 이 worker가 아직 점유 중인 리뷰만 저장
+def process_jobs(worker, jobs, lease_seconds, analyze_options):
+    stop = threading.Event()
+    renewer = threading.Thread(target=renew_leases, args=(worker, lease_seconds, stop),
+                               name="lease-renewer", daemon=True)
+    renewer.start()
+    try:
+        review_ids = [rid for rid, _ in jobs]
+        reviews = list(iter_clean_reviews(review_ids=review_ids))
+
+        def checkpoint(rows, done_reviews):
+            save_analyze_review(rows, done_reviews=done_reviews, worker=worker)
+
+        analyze_reviews(reviews, on_checkpoint=checkpoint, report=False, **analyze_options)
+        # 제외 문구/이미 분석된 리뷰 등 분석할 내용이 없던 작업도 완료 처리
+        save_analyze_review([], done_reviews=jobs, worker=worker)
+    finally:
+        stop.set()
+        renewer.join()
+
+
+# report_every 초마다 METRICS_DIR/worker-{worker_id}.json/.prom 을 덮어씀 (종료할 때도 한 번)
+def run_worker(batch_size=50, lease_seconds=600, max_attempts=3, poll=10, exit_when_empty=False,
+               analyze_options=None, report_every=60):
+    analyze_options = analyze_options or {"concurrency": 8, "batch_size": 20}
+    worker = worker_name()
+    report_name = f"worker-{worker_id()}"
+    metrics.set_labels(worker=worker_id())
+    reported = time.monotonic()
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+    print(f"분석 worker 시작: {worker} (batch {batch_size}, lease {lease_seconds}초)")
+
+    processed = 0
+    try:
+        while not stopping:
+            if time.monotonic() - reported >= report_every:
+                metrics.write_report(name=report_name, verbose=False)
+                reported = time.monotonic()
+
+            jobs = claim_analyze_jobs(worker, batch_size, lease_seconds, max_attempts)
+            if not jobs:
+                if exit_when_empty:
+                    break
+                time.sleep(poll)
+                continue
+
+            with metrics.timer("worker_batch_seconds"):
+                try:
+                    process_jobs(worker, jobs, lease_seconds, analyze_options)
+                except Exception as e:
+                    # 끝난 리뷰는 체크포인트로 이미 저장됨, 나머지만 다시 큐로
+                    release_analyze_jobs(worker, [rid for rid, _ in jobs], e, max_attempts)
+                    metrics.inc("worker_batch_failures", error=type(e).__name__)
+                    print(f"배치 처리 실패 ({type(e).__name__}: {e}), 작업 반환")
+                    time.sleep(poll)
+                    continue
+            processed += len(jobs)
+    finally:
+        if analyze_options.get("use_cache", True):
+            get_cache().report()
+        if analyze_options.get("cascade"):
+            analyze_options["cascade"].report()
+        metrics.write_report(name=report_name)
+
+    print(f"분석 worker 종료: 작업 {processed}개 처리")
+    return processed
@@ -0,0 +1,82 @@
+import os
+import time
+from contextlib import contextmanager
+
+import pymysql
+from dotenv import load_dotenv
+
+# 벤치마크용 일회용 DB
+# BENCH_DB_* (없으면 DB_*) 환경변수의 MySQL 서버에 ohou_bench_* 데이터베이스를 새로 만들고
+# initdb.d/init.sql + migrations 를 적용한 뒤, 끝나면 삭제
+# 예) docker run -d --name bench-mysql -e MYSQL_ROOT_PASSWORD=bench -p 3307:3306 mysql:8
+#     BENCH_DB_HOST=127.0.0.1 BENCH_DB_PORT=3307 BENCH_DB_USER=root BENCH_DB_PASSWORD=bench
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+INIT_SQL = os.path.join(BENCH_DIR, "..", "DB", "initdb.d", "init.sql")
+
+
+def server_config():
+    load_dotenv()
+
+    def env(name, default=None):
+        return os.getenv(f"BENCH_DB_{name}") or os.getenv(f"DB_{name}") or default
+
+    return dict(
+        host=env("HOST", "127.0.0.1"),
+        port=int(env("PORT", "3306")),
+        user=env("USER", "root"),
+        password=env("PASSWORD", ""),
+        charset="utf8mb4",
+    )
+
+
+# init.sql 문장 목록 (USE 문은 빼고 새 데이터베이스에 적용)
+def init_statements():
+    from db.migrate import split_statements
+
+    with open(INIT_SQL, encoding="utf-8") as f:
+        statements = split_statements(f.read())
+    return [stmt for stmt in statements if not stmt.upper().startswith("USE ")]
+
+
+# 일회용 DB를 만들고 db.db 가 그 DB를 쓰도록 DB_* 환경변수를 바꿈
+# db.db 의 설정/커넥션 풀은 처음 쓸 때 만들어지므로 이 블록 안에서 처음 사용해야 함
+@contextmanager
+def disposable_database(keep=False):
+    config = server_config()
+    name = f"ohou_bench_{os.getpid()}_{int(time.time())}"
+
+    conn = pymysql.connect(**config)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"CREATE DATABASE `{name}` CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
+            cur.execute(f"USE `{name}`")
+            for stmt in init_statements():
+                cur.execute(stmt)
+        conn.commit()
+    except Exception:
+        conn.close()
+        raise
+
+    os.environ.update({
+        "DB_HOST": config["host"],
+        "DB_PORT": str(config["port"]),
+        "DB_USER": config["user"],
+        "DB_PASSWORD": config["password"],
+        "DB_DATABASE": name,
+    })
+    try:
+        from db.migrate import migrate
+
+        migrate()
+        print(f"벤치마크 DB 준비 완료: {name}")
+        yield name
+    finally:
+        if keep:
+            print(f"벤치마크 DB 유지: {name}")
+        else:
+            conn.ping(reconnect=True)  # 오래 걸린 벤치마크 동안 끊겼을 수 있음
+            with conn.cursor() as cur:
+                cur.execute(f"DROP DATABASE IF EXISTS `{name}`")
+            print(f"벤치마크 DB 삭제: {name}")
+        conn.close()
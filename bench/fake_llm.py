@@ -0,0 +1,141 @@
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# OpenAI Chat Completions API 흉내 내는 로컬 서버 (벤치마크용)
+# 프롬프트 종류(배치/통합/카테고리/키워드/감성)를 보고 문장마다 항상 같은 JSON을 돌려줌
+# ChatOpenAI는 OPENAI_BASE_URL 환경변수로 이 서버를 바라보게 함 (실제 HTTP 경로와 파서까지 그대로 측정)
+
+CATEGORIES = ["배송", "사용감", "사이즈", "디자인", "품질", "None"]
+SENTIMENTS = ["긍정", "부정"]
+WORD_RE = re.compile(r"[가-힣A-Za-z]{2,}")
+BATCH_INPUT_RE = re.compile(r"Input:\s*(\[.*?\])\s*Output:", re.S)
+SENTENCE_RE = re.compile(r'Sentence:\s*"(.*?)"\s*Output:', re.S)
+INPUT_SENTENCE_RE = re.compile(r'Input sentence:\s*"(.*?)"\s*Output:', re.S)
+
+
+# 문장 -> 결정적인 분석 결과
+def analyze(sentence):
+    digest = hashlib.sha256(sentence.encode("utf-8")).digest()
+    words = WORD_RE.findall(sentence)
+    return {
+        "category": CATEGORIES[digest[0] % len(CATEGORIES)],
+        "keywords": words[:1 + digest[1] % 3] or ["상품"],
+        "sentiment": SENTIMENTS[digest[2] % len(SENTIMENTS)],
+    }
+
+
+# 프롬프트 -> 응답 본문 (JSON 문자열)
+def respond(prompt):
+    match = BATCH_INPUT_RE.search(prompt)
+    if "input JSON array" in prompt and match:
+        items = json.loads(match.group(1))
+        return json.dumps([{"id": item["id"], **analyze(item["sentence"])} for item in items], ensure_ascii=False)
+
+    match = SENTENCE_RE.search(prompt) or INPUT_SENTENCE_RE.search(prompt)
+    sentence = match.group(1) if match else prompt
+    result = analyze(sentence)
+    if "review analysis assistant" in prompt:
+        body = result
+    elif "classification assistant" in prompt:
+        body = {"sentence": sentence, "category": result["category"]}
+    elif "Extract 1-5" in prompt:
+        body = {"sentence": sentence, "keywords": result["keywords"]}
+    else:
+        body = {"sentence": sentence, "sentiment": result["sentiment"]}
+    return json.dumps(body, ensure_ascii=False)
+
+
+class FakeLLM:
+    # latency: 요청당 기본 지연, per_token: 출력 토큰당 추가 지연 (초)
+    def __init__(self, latency=0.3, jitter=0.1, per_token=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.per_token = per_token
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if not self.path.endswith("/chat/completions"):
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                prompt = "\n".join(str(m.get("content", "")) for m in request.get("messages", []))
+                content = respond(prompt)
+                prompt_tokens = len(prompt) // 2
+                completion_tokens = len(content) // 2
+                with fake.lock:
+                    fake.requests += 1
+                time.sleep(max(0.0, fake.latency + random.uniform(-fake.jitter, fake.jitter)
+                               + fake.per_token * completion_tokens))
+
+                body = json.dumps({
+                    "id": f"chatcmpl-bench-{fake.requests}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model", "fake"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens,
+                        "total_tokens": prompt_tokens + completion_tokens,
+                    },
+                }, ensure_ascii=False).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    # 백그라운드 스레드로 서버 시작, OPENAI_BASE_URL 값 반환
+    def start(self, host="127.0.0.1", port=0):
+        self.server = ThreadingHTTPServer((host, port), self.handler())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name="fake-llm", daemon=True)
+        self.thread.start()
+        return f"http://{host}:{self.server.server_address[1]}/v1"
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8802)
+    parser.add_argument("--latency", type=float, default=0.3, help="요청당 지연 (초)")
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--per-token", type=float, default=0.0, help="출력 토큰당 추가 지연 (초)")
+    args = parser.parse_args()
+
+    fake = FakeLLM(args.latency, args.jitter, args.per_token)
+    url = fake.start(port=args.port)
+    print(f"가짜 LLM 서버 실행 중: OPENAI_BASE_URL={url}")
+    try:
+        fake.thread.join()
+    except KeyboardInterrupt:
+        fake.stop()
@@ -0,0 +1,193 @@
+import argparse
+import copy
+import datetime
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from bench.seed import FIXTURES_DIR
+
+# 오늘의집 대신 쓰는 로컬 HTTP 서버 (벤치마크용)
+# - /ranks                         : 빌드 토큰이 들어 있는 스토어 HTML
+# - /_next/data/{token}/ko-KR/ranks.json : 카테고리별 베스트 상품 (top_n개)
+# - /production_reviews.json       : 상품별 리뷰 (최신순, 페이지당 per_page개)
+# fixture(bench/fixtures, python -m bench.seed)가 있으면 실제 응답을 틀로 써서 재생하고, 없으면 합성
+# 크롤러는 OHOU_STORE_URL / OHOU_REVIEW_URL 환경변수로 이 서버를 바라보게 함
+
+BUILD_TOKEN = "benchBuildToken"
+SAMPLE_COMMENTS = [
+    "배송이 빨라서 좋았어요. 포장도 꼼꼼했습니다.",
+    "색감이 사진이랑 똑같고 디자인이 예뻐요!",
+    "사이즈가 생각보다 작아요. 한 치수 크게 사세요.",
+    "촉감이 부드럽고 착용감이 좋아요. 재구매 의사 있습니다.",
+    "마감이 조금 아쉬워요. 실밥이 나와 있었어요.",
+    "가격 대비 품질이 괜찮아요.",
+    "최고예요",
+]
+
+
+def load_fixture(name):
+    path = os.path.join(FIXTURES_DIR, name)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class FakeOhou:
+    def __init__(self, reviews_per_product=100, per_page=5, top_n=20, latency=0.0, jitter=0.0):
+        self.reviews_per_product = reviews_per_product
+        self.per_page = per_page
+        self.top_n = top_n
+        self.latency = latency
+        self.jitter = jitter
+        self.ranks = load_fixture("ranks.json")
+        recorded = load_fixture("production_reviews.json")
+        self.review_templates = recorded["reviews"] if recorded else []
+        self.product_templates = self.products_parent(self.ranks)["products"] if self.ranks else []
+        self.offsets = {}  # 상품ID -> 리뷰ID 시작값 (처음 요청된 순서대로 배정)
+        self.next_offset = 1
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    # ranks.json 안에서 products가 들어 있는 위치 (crawler.OhouClient.product_list와 같은 경로)
+    @staticmethod
+    def products_parent(payload):
+        return payload["pageProps"]["dehydratedState"]["queries"][1]["state"]["data"]
+
+    def sleep(self):
+        if self.latency or self.jitter:
+            time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+
+    # 카테고리별 상품 (10개 중 1개는 여러 카테고리에 같이 나오는 상품)
+    def products(self, category_id):
+        category_index = (category_id // 1_000_000) % 100
+        products = []
+        for rank in range(self.top_n):
+            if rank % 10 == 9:
+                product_id = 100_000 + rank
+            else:
+                product_id = category_index * 1000 + rank + 1
+            template = self.product_templates[rank % len(self.product_templates)] if self.product_templates else {}
+            product = copy.deepcopy(template)
+            product.update({
+                "id": product_id,
+                "brandName": template.get("brandName", f"브랜드{product_id % 50}"),
+                "name": f"{template.get('name', '벤치마크 상품')} #{product_id}",
+            })
+            products.append(product)
+        return products
+
+    def ranks_payload(self, category_id):
+        payload = copy.deepcopy(self.ranks) if self.ranks else {
+            "pageProps": {"dehydratedState": {"queries": [{}, {"state": {"data": {}}}]}}
+        }
+        self.products_parent(payload)["products"] = self.products(category_id)
+        return payload
+
+    def review_offset(self, product_id):
+        with self.lock:
+            if product_id not in self.offsets:
+                self.offsets[product_id] = self.next_offset
+                self.next_offset += self.reviews_per_product
+            return self.offsets[product_id]
+
+    # position 0이 가장 최신 리뷰 (리뷰ID가 가장 큼)
+    def review(self, product_id, position):
+        review_id = self.review_offset(product_id) + self.reviews_per_product - 1 - position
+        rng = random.Random(review_id)
+        template = self.review_templates[review_id % len(self.review_templates)] if self.review_templates else None
+        if template:
+            comment = template["review"]["comment"]
+            explain = template["production_information"].get("explain", "")
+            star = template["review"]["star_avg"]
+        else:
+            comment = " ".join(rng.sample(SAMPLE_COMMENTS, rng.randint(1, 3)))
+            explain = f"색상: 옵션{rng.randint(1, 5)}"
+            star = float(rng.randint(1, 5))
+        created = datetime.date(2025, 8, 19) - datetime.timedelta(days=position // 20)
+        return {
+            "id": review_id,
+            "created_at": created.strftime("%Y.%m.%d"),
+            "writer_id": rng.randint(1, 10_000_000),
+            "writer_nickname": f"user{review_id % 100_000}",
+            "production_information": {"id": product_id, "explain": explain},
+            "review": {"star_avg": star, "comment": comment},
+        }
+
+    def reviews_payload(self, product_id, page):
+        start = (page - 1) * self.per_page
+        end = min(start + self.per_page, self.reviews_per_product)
+        return {"reviews": [self.review(product_id, position) for position in range(start, end)]}
+
+    def handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def log_message(self, format, *args):
+                pass
+
+            def send(self, status, body, content_type="application/json"):
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                with fake.lock:
+                    fake.requests += 1
+                fake.sleep()
+                url = urlparse(self.path)
+                query = {k: v[0] for k, v in parse_qs(url.query).items()}
+                if url.path == "/ranks":
+                    html = (f'<html><head><script defer src="/_next/static/{BUILD_TOKEN}/_ssgManifest.js">'
+                            f'</script></head></html>')
+                    return self.send(200, html, "text/html")
+                if url.path == f"/_next/data/{BUILD_TOKEN}/ko-KR/ranks.json":
+                    category_id = int(query.get("category_id", 18000000))
+                    return self.send(200, json.dumps(fake.ranks_payload(category_id), ensure_ascii=False))
+                if url.path == "/production_reviews.json":
+                    payload = fake.reviews_payload(int(query["production_id"]), int(query.get("page", 1)))
+                    return self.send(200, json.dumps(payload, ensure_ascii=False))
+                return self.send(404, "{}")
+
+        return Handler
+
+    # 백그라운드 스레드로 서버 시작, 기본 URL 반환
+    def start(self, host="127.0.0.1", port=0):
+        self.server = ThreadingHTTPServer((host, port), self.handler())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name="fake-ohou", daemon=True)
+        self.thread.start()
+        return f"http://{host}:{self.server.server_address[1]}"
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8801)
+    parser.add_argument("--reviews-per-product", type=int, default=100)
+    parser.add_argument("--per-page", type=int, default=5)
+    parser.add_argument("--top-n", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="요청당 지연 (초)")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    args = parser.parse_args()
+
+    fake = FakeOhou(args.reviews_per_product, args.per_page, args.top_n, args.latency, args.jitter)
+    url = fake.start(port=args.port)
+    print(f"가짜 오늘의집 서버 실행 중: OHOU_STORE_URL={url} OHOU_REVIEW_URL={url}")
+    try:
+        fake.thread.join()
+    except KeyboardInterrupt:
+        fake.stop()
@@ -0,0 +1,192 @@
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+
+from bench.disposable_db import disposable_database
+from bench.fake_llm import FakeLLM
+from bench.fake_ohou import FakeOhou
+
+# 오프라인 처리량 벤치마크
+# 가짜 오늘의집 서버 + 가짜 LLM 서버 + 일회용 MySQL DB로 파이프라인 단계별 rows/sec 측정
+#
+#   python -m bench.seed                         # (선택) 노트북 응답으로 fixture 생성
+#   python -m bench.run --reviews 10000          # 1k ~ 1M
+#   python -m bench.run --reviews 10000 --baseline bench/results/<이전 결과>.json
+#
+# 결과는 bench/results/bench-*.json 에 저장 (실행 지표 포함)
+# --baseline 을 주면 단계별 rows/sec 를 비교하고 tolerance 이상 느려지면 종료 코드 1
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+
+class StageTimer:
+    def __init__(self):
+        self.stages = []
+
+    def run(self, name, fn, count):
+        started = time.perf_counter()
+        result = fn()
+        seconds = time.perf_counter() - started
+        rows = count(result)
+        self.stages.append({
+            "stage": name,
+            "rows": rows,
+            "seconds": round(seconds, 3),
+            "rows_per_sec": round(rows / seconds, 1) if seconds else 0.0,
+        })
+        print(f"[{name}] {rows}행, {seconds:.2f}초 ({self.stages[-1]['rows_per_sec']} rows/s)")
+        return result
+
+
+# 단계별 실행 (기존 순차 실행과 같은 순서)
+def run_stages(args, pages, categories):
+    from crawler.crawler import product_list, product_review
+    from db.db import insert_product, insert_product_review, insert_product_list, save_analyze_review
+    from analyzer.ohou_LLM import clean_reviews, analyze_reviews
+
+    timer = StageTimer()
+    products = timer.run("products", lambda: product_list(categories, args.products), len)
+    timer.run("ingest_products", lambda: (insert_product(products), insert_product_list()), lambda _: len(products))
+    reviews = timer.run("crawl", lambda: product_review(pages=pages, rps=args.rps, categories=categories,
+                                                        top_n=args.products, workers=args.crawl_workers,
+                                                        max_concurrency=args.http_concurrency,
+                                                        per_host=args.http_concurrency), len)
+    timer.run("ingest", lambda: insert_product_review(reviews), lambda stats: stats["inserted"])
+    del reviews
+    cleaned = timer.run("clean", clean_reviews, len)
+    results = timer.run("analyze", lambda: analyze_reviews(cleaned, batch_size=args.batch_size,
+                                                           concurrency=args.llm_concurrency,
+                                                           use_cache=False, report=False), len)
+    done = [(rid, productID) for rid, _, productID in cleaned]
+    timer.run("persist", lambda: save_analyze_review(results, done_reviews=done), lambda _: len(results))
+    return timer.stages
+
+
+# 스트리밍 파이프라인 전체 (크롤링 리뷰 수 기준 rows/sec)
+def run_streaming(args, pages, categories):
+    from db.db import get_conn
+    from pipeline import run_pipeline
+
+    timer = StageTimer()
+
+    def count_reviews(_):
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT COUNT(*) FROM tb_reviews")
+                return cur.fetchone()[0]
+
+    timer.run("pipeline", lambda: run_pipeline(
+        pages=pages,
+        categories=categories,
+        top_n=args.products,
+        crawl_options={"rps": args.rps, "max_concurrency": args.http_concurrency,
+                       "per_host": args.http_concurrency, "workers": args.crawl_workers},
+        analyze_options={"concurrency": args.llm_concurrency, "batch_size": args.batch_size,
+                         "use_cache": False},
+    ), count_reviews)
+    return timer.stages
+
+
+# 이전 결과와 단계별 rows/sec 비교, 느려진 단계 목록 반환
+def compare(stages, baseline_path, tolerance):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {stage["stage"]: stage for stage in json.load(f)["stages"]}
+
+    regressions = []
+    print(f"\n기준 결과 비교 ({baseline_path})")
+    for stage in stages:
+        before = baseline.get(stage["stage"])
+        if not before or not before["rows_per_sec"]:
+            continue
+        change = stage["rows_per_sec"] / before["rows_per_sec"] - 1
+        flag = ""
+        if change < -tolerance:
+            flag = "  <- 느려짐"
+            regressions.append(stage["stage"])
+        print(f"  {stage['stage']:<10} {before['rows_per_sec']:>10} -> {stage['rows_per_sec']:>10} rows/s "
+              f"({change:+.1%}){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reviews", type=int, default=1000, help="전체 리뷰 수 (1k ~ 1M)")
+    parser.add_argument("--categories", type=int, default=1, help="카테고리 수")
+    parser.add_argument("--products", type=int, default=4, help="카테고리별 베스트 상품 수 (top_n)")
+    parser.add_argument("--per-page", type=int, default=5, help="리뷰 API 페이지당 리뷰 수")
+    parser.add_argument("--http-latency", type=float, default=0.05)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--llm-jitter", type=float, default=0.1)
+    parser.add_argument("--rps", type=float, default=0, help="크롤러 초당 요청 제한 (0이면 제한 없음)")
+    parser.add_argument("--http-concurrency", type=int, default=16)
+    parser.add_argument("--crawl-workers", type=int, default=None, help="크롤링 샤드 워커 수 (기본 http-concurrency)")
+    parser.add_argument("--llm-concurrency", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--streaming", action="store_true", help="단계별 대신 스트리밍 파이프라인 전체를 측정")
+    parser.add_argument("--keep-db", action="store_true", help="끝나도 벤치마크 DB 삭제 안 함")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="허용하는 rows/sec 감소 비율")
+    args = parser.parse_args()
+
+    # 카테고리마다 10개 중 1개는 겹치는 상품이라 실제 상품 수는 조금 적음 (가짜 서버 참고)
+    categories = [(10 + i) * 1_000_000 for i in range(args.categories)]
+    reviews_per_product = math.ceil(args.reviews / (args.products * args.categories))
+    pages = math.ceil(reviews_per_product / args.per_page)
+
+    fake_ohou = FakeOhou(reviews_per_product, args.per_page, top_n=args.products, latency=args.http_latency,
+                         jitter=args.http_latency / 2)
+    fake_llm = FakeLLM(args.llm_latency, args.llm_jitter)
+    ohou_url = fake_ohou.start()
+    llm_url = fake_llm.start()
+    work_dir = tempfile.mkdtemp(prefix="ohou_bench_")
+
+    # 크롤러/LLM 모듈은 import 할 때 URL을 읽으므로 import 전에 설정
+    os.environ.update({
+        "OHOU_STORE_URL": ohou_url,
+        "OHOU_REVIEW_URL": ohou_url,
+        "OPENAI_BASE_URL": llm_url,
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY") or "bench",
+        "LLM_CACHE_PATH": os.path.join(work_dir, "llm_cache.sqlite3"),
+        "METRICS_DIR": work_dir,
+    })
+
+    try:
+        with disposable_database(keep=args.keep_db):
+            if args.streaming:
+                stages = run_streaming(args, pages, categories)
+            else:
+                stages = run_stages(args, pages, categories)
+    finally:
+        fake_ohou.stop()
+        fake_llm.stop()
+
+    from monitor.metrics import metrics
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "config": vars(args),
+            "stages": stages,
+            "http_requests": fake_ohou.requests,
+            "llm_requests": fake_llm.requests,
+            "metrics": metrics.snapshot(),
+        }, f, ensure_ascii=False, indent=2)
+
+    print(f"\n{'stage':<10} {'rows':>10} {'seconds':>10} {'rows/s':>10}")
+    for stage in stages:
+        print(f"{stage['stage']:<10} {stage['rows']:>10} {stage['seconds']:>10} {stage['rows_per_sec']:>10}")
+    print(f"HTTP 요청 {fake_ohou.requests}회, LLM 요청 {fake_llm.requests}회")
+    print(f"결과 저장: {path}")
+
+    if args.baseline and compare(stages, args.baseline, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import ast
+import json
+import os
+
+# practice_code 노트북 출력에 남아 있는 실제 응답으로 벤치마크 fixture 만들기
+# - ranks.json: 베스트 랭킹 _next/data 응답 (pageProps ...)
+# - production_reviews.json: 리뷰 API 응답 ({"reviews": [...]}, 노트북에 있는 페이지를 합침)
+# 실행: python -m bench.seed  (bench/fixtures/ 에 저장, 개인정보가 있어서 git에는 올리지 않음)
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+DEFAULT_NOTEBOOK = os.path.join(BENCH_DIR, "..", "practice_code", "ohou_crawler.ipynb")
+
+
+# 노트북에서 crawler.parse_review 형태로 정리된 리뷰 -> 리뷰 API 형식
+def to_raw_review(parsed, product_id):
+    return {
+        "id": parsed["리뷰ID"],
+        "created_at": parsed["작성날짜"],
+        "writer_id": parsed["고객ID"],
+        "writer_nickname": parsed["고객닉네임"],
+        "production_information": {"id": parsed.get("상품ID", product_id), "explain": parsed["상품옵션"]},
+        "review": {"star_avg": parsed["별점"], "comment": parsed["작성내용"]},
+    }
+
+
+# 노트북 셀 출력(text/plain, 파이썬 repr)을 값으로 변환
+def iter_outputs(notebook_path):
+    with open(notebook_path, encoding="utf-8") as f:
+        notebook = json.load(f)
+    for cell in notebook["cells"]:
+        for output in cell.get("outputs", []):
+            text = "".join(output.get("data", {}).get("text/plain", []))
+            if not text:
+                continue
+            try:
+                yield ast.literal_eval(text)
+            except (ValueError, SyntaxError):
+                continue
+
+
+def seed(notebook_path=DEFAULT_NOTEBOOK, out_dir=FIXTURES_DIR):
+    ranks = None
+    reviews = {}
+    for value in iter_outputs(notebook_path):
+        if ranks is None and isinstance(value, dict) and "pageProps" in value:
+            ranks = value
+        pages = value if isinstance(value, list) else [value]
+        for page in pages:
+            if isinstance(page, dict) and isinstance(page.get("reviews"), list):
+                for review in page["reviews"]:
+                    reviews[review["id"]] = review
+            elif isinstance(page, dict) and "리뷰ID" in page:
+                reviews.setdefault(page["리뷰ID"], to_raw_review(page, None))
+
+    if ranks is None or not reviews:
+        raise RuntimeError(f"노트북에서 ranks.json / production_reviews.json 응답을 찾지 못함: {notebook_path}")
+
+    os.makedirs(out_dir, exist_ok=True)
+    ordered = sorted(reviews.values(), key=lambda r: r["id"], reverse=True)  # 최신순
+    with open(os.path.join(out_dir, "ranks.json"), "w", encoding="utf-8") as f:
+        json.dump(ranks, f, ensure_ascii=False)
+    with open(os.path.join(out_dir, "production_reviews.json"), "w", encoding="utf-8") as f:
+        json.dump({"reviews": ordered}, f, ensure_ascii=False)
+    print(f"fixture 저장 완료! 리뷰 {len(ordered)}개 ({out_dir})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--notebook", default=DEFAULT_NOTEBOOK)
+    parser.add_argument("--out", default=FIXTURES_DIR)
+    args = parser.parse_args()
+    seed(args.notebook, args.out)
@@ -1,115 +1,471 @@
-from db.db import get_latest_review_id
-from bs4 import BeautifulSoup
+from db.db import get_review_watermarks
+from monitor.metrics import metrics
+import asyncio
+import os
+import queue
+import random
+import re
+import threading
+import time
+import aiohttp
 import requests
+from tqdm import tqdm
+
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36",
+    "Sec-Fetch-Dest": "empty",
+    "Sec-Fetch-Mode": "cors",
+    "Sec-Fetch-Site": "same-origin",
+}
+
+
+# 벤치마크용 가짜 서버 등으로 바꿀 수 있게 환경변수로 설정
+STORE_URL = os.getenv("OHOU_STORE_URL", "https://store.ohou.se")
+REVIEW_API_URL = os.getenv("OHOU_REVIEW_URL", "https://ohou.se")
+BUILD_TOKEN_RE = re.compile(r"/_next/static/([\w-]+)/_ssgManifest\.js")
+
+
+# 오늘의집 크롤링 클라이언트
+# - requests 세션을 유지해서 keep-alive 연결 재사용
+# - Next.js 빌드 토큰(_next/data/{token})을 TTL 동안 캐시, 404가 나면 다시 조회
+# - 카테고리별 상품 랭킹은 실행 중 한 번만 요청
+class OhouClient:
+    def __init__(self, token_ttl=3600):
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        self.token_ttl = token_ttl
+        self.token = None
+        self.token_time = 0.0
+        self.ranks = {}
+
+    # GET 요청 + 지연시간 기록 (http_request_seconds{target, status})
+    def get(self, url, target):
+        started = time.perf_counter()
+        try:
+            res = self.session.get(url)
+        except requests.RequestException:
+            metrics.observe("http_request_seconds", time.perf_counter() - started, target=target, status="error")
+            raise
+        metrics.observe("http_request_seconds", time.perf_counter() - started, target=target, status=res.status_code)
+        return res
+
+    # 스토어 HTML에서 빌드 토큰 추출
+    def resolve_token(self, category_id=18000000):
+        response = self.get(f"{STORE_URL}/ranks?type=best&category_id={category_id}", "store")
+        html = response.text
+        match = BUILD_TOKEN_RE.search(html)
+        if match:
+            return match.group(1)
+        from bs4 import BeautifulSoup  # 정규식으로 못 찾을 때만 사용
+
+        soup = BeautifulSoup(html, "html.parser")
+        title = soup.select_one("head > script:nth-child(31)")
+        return title["src"].split("/")[6]
+
+    def build_token(self, refresh=False):
+        expired = time.monotonic() - self.token_time > self.token_ttl
+        if refresh or self.token is None or expired:
+            self.token = self.resolve_token()
+            self.token_time = time.monotonic()
+        return self.token
+
+    # _next/data JSON 요청, 토큰이 바뀌어서 404면 한 번만 다시 조회
+    def next_data(self, path):
+        res = self.get(f"{STORE_URL}/_next/data/{self.build_token()}/ko-KR/{path}", "next_data")
+        if res.status_code == 404:
+            metrics.inc("http_retries", target="next_data")
+            res = self.get(f"{STORE_URL}/_next/data/{self.build_token(refresh=True)}/ko-KR/{path}", "next_data")
+        return res
+
+    # 상품 목록 크롤링 (카테고리별로 메모이즈)
+    def product_list(self, category_id=18000000):
+        if category_id in self.ranks:
+            return self.ranks[category_id]
+
+        # 요청 보내기
+        res = self.next_data(f"ranks.json?type=best&category_id={category_id}")
+        print("응답 상태 코드:", res.status_code)  # 상태 코드 확인
+
+        # JSON 파싱 안전하게
+        try:
+            data = res.json()
+            goods_lists = data["pageProps"]["dehydratedState"]["queries"][1]["state"][
+                "data"
+            ]["products"]
+        except (ValueError, KeyError):
+            return []
+
+        # 결과 저장
+        result = []
+        for goods in goods_lists:
+            result.append(
+                {
+                    "상품ID": goods["id"],
+                    "브랜드명": goods["brandName"],
+                    "제품명": goods["name"],
+                }
+            )
+
+        self.ranks[category_id] = result
+        return result
+
+
+client = OhouClient()
+
+
+DEFAULT_CATEGORIES = [18000000]  # 패브릭
 
 
 # 상품 목록 크롤링
-def product_list():
-    response = requests.get(
-        "https://store.ohou.se/ranks?type=best&category_id=18000000",
-        headers={
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36",
-            "Sec-Fetch-Dest": "empty",
-            "Sec-Fetch-Mode": "cors",
-            "Sec-Fetch-Site": "same-origin",
-        },
-    )
-    html = response.text
-    soup = BeautifulSoup(html, "html.parser")
-    title = soup.select_one("head > script:nth-child(31)")
-    token = title["src"].split("/")[6]
-
-    url = f"https://store.ohou.se/_next/data/{token}/ko-KR/ranks.json?type=best&category_id=18000000"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36",
-        "Sec-Fetch-Dest": "empty",
-        "Sec-Fetch-Mode": "cors",
-        "Sec-Fetch-Site": "same-origin",
+# 카테고리별 베스트 랭킹 상위 top_n개(None이면 전체)를 합치고 상품ID로 중복 제거 (먼저 나온 순서 유지)
+def product_list(categories=None, top_n=4):
+    categories = categories or DEFAULT_CATEGORIES
+    seen = set()
+    products = []
+    for category_id in tqdm(categories, desc="카테고리별 상품 목록", disable=len(categories) == 1):
+        for prod in client.product_list(category_id)[:top_n]:
+            if prod["상품ID"] not in seen:
+                seen.add(prod["상품ID"])
+                products.append(prod)
+    return products
+
+
+# 리뷰 페이지 URL
+def review_url(product_id, page):
+    return f"{REVIEW_API_URL}/production_reviews.json?production_id={product_id}&page={page}&order=recent&photo_review_only="
+
+
+# 리뷰 JSON -> DB 저장용 dict
+def parse_review(r):
+    return {
+        "리뷰ID": r["id"],
+        "상품ID": r["production_information"]["id"],
+        "고객ID": r["writer_id"],
+        "고객닉네임": r["writer_nickname"],
+        "상품옵션": r["production_information"]["explain"],
+        "별점": r["review"]["star_avg"],
+        "작성내용": r["review"]["comment"],
+        "작성날짜": r["created_at"],
     }
 
-    # 요청 보내기
-    res = requests.get(url, headers=headers)
-    print("응답 상태 코드:", res.status_code)  # 상태 코드 확인
 
-    # JSON 파싱 안전하게
-    try:
-        data = res.json()
-        goods_lists = data["pageProps"]["dehydratedState"]["queries"][1]["state"][
-            "data"
-        ]["products"]
-    except (ValueError, KeyError):
-        return []
-
-    # 결과 저장
-    result = []
-    for goods in goods_lists:
-        result.append(
-            {
-                "상품ID": goods["id"],
-                "브랜드명": goods["brandName"],
-                "제품명": goods["name"],
-            }
+# 리뷰가 상품별 기준점(이미 저장된 최신 리뷰) 이하인지 확인
+# 최신순 정렬이라 기준점 아래로 내려가면 그 뒤는 전부 저장된 리뷰
+def below_watermark(r, watermark):
+    if watermark is None:
+        return False
+    latest_id, latest_date = watermark
+    if r["id"] <= latest_id:
+        return True
+    created = str(r["created_at"])[:10].replace(".", "-")
+    return latest_date is not None and created < str(latest_date)
+
+
+# 초당 요청 수 제한 (모든 요청이 공유)
+class RateLimiter:
+    def __init__(self, rps):
+        self.interval = 1.0 / rps if rps else 0
+        self.next_time = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self.lock:
+            now = time.monotonic()
+            if self.next_time > now:
+                await asyncio.sleep(self.next_time - now)
+                now = time.monotonic()
+            self.next_time = max(now, self.next_time) + self.interval
+
+
+# 재시도해도 받지 못한 리뷰 페이지
+class ReviewPageError(Exception):
+    pass
+
+
+# 리뷰 API 응답 확인 (200이고 reviews 목록이 있어야 정상), 문제가 있으면 오류 설명 반환
+def review_page_error(status, data):
+    if status != 200:
+        return f"HTTP {status}"
+    if not isinstance(data, dict) or not isinstance(data.get("reviews"), list):
+        return "응답에 reviews 없음"
+    return None
+
+
+def retry_delay(attempt, base_delay=1.0, max_delay=30.0):
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+# 리뷰 한 페이지 비동기 요청
+# 429/5xx, 타임아웃/연결 오류, 잘못된 응답은 지수 백오프 + jitter로 retries번 재시도
+# 그래도 실패하면 ReviewPageError (빈 페이지로 넘기면 뒤 페이지만 저장되고 기준점이 빈 구간을 지나감)
+async def fetch_review_page(session, sem, limiter, product_id, page, retries=3):
+    error = None
+    for attempt in range(retries + 1):
+        if attempt:
+            metrics.inc("http_retries", target="reviews")
+            await asyncio.sleep(retry_delay(attempt - 1))
+        async with sem:
+            await limiter.wait()
+            started = time.perf_counter()
+            status = "error"
+            try:
+                async with session.get(review_url(product_id, page)) as res:
+                    status = res.status
+                    data = await res.json(content_type=None) if res.status == 200 else None
+                error = review_page_error(status, data)
+                if error is None:
+                    return data
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                error = type(e).__name__
+            finally:
+                metrics.observe("http_request_seconds", time.perf_counter() - started, target="reviews", status=status)
+    raise ReviewPageError(f"상품 {product_id} {page}페이지: {error}")
+
+
+# 상품 하나의 리뷰를 page_window 페이지씩 동시에 요청해서 묶음 단위로 넘겨줌
+# 기준점 아래 리뷰를 만나면 그 뒤 페이지는 버리고 중단
+# 기준점에 닿기 전에 받지 못한 페이지가 있으면 ReviewPageError
+async def iter_product_pages(session, sem, limiter, product_id, pages, watermark, page_window):
+    # 기준점이 있으면 보통 1~2페이지면 끝나므로 1페이지부터 두 배씩 늘려가며 요청
+    size = 1 if watermark else page_window
+    start = 1
+    while start <= pages:
+        window = range(start, min(start + size, pages + 1))
+        start += size
+        size = min(size * 2, page_window)
+        results = await asyncio.gather(
+            *(fetch_review_page(session, sem, limiter, product_id, page) for page in window),
+            return_exceptions=True,
         )
+        reviews = []
+        for data in results:
+            if isinstance(data, BaseException):
+                raise data
+            for r in data["reviews"]:
+                if below_watermark(r, watermark):
+                    if reviews:
+                        yield reviews
+                    return
+                reviews.append(parse_review(r))
+        if reviews:
+            yield reviews
+
 
-    return result[:4]  # 상품4개 가져오기
+async def crawl_product_reviews(session, sem, limiter, product_id, pages, watermark, page_window):
+    reviews = []
+    async for batch in iter_product_pages(session, sem, limiter, product_id, pages, watermark, page_window):
+        reviews.extend(batch)
+    return reviews
+
+
+# 상품을 workers개 샤드로 나누기 (라운드로빈이라 랭킹 상위 상품이 샤드마다 고르게 섞임)
+def shard_products(products, workers):
+    workers = max(1, min(workers, len(products)))
+    return [products[i::workers] for i in range(workers)]
+
+
+# 페이지를 받지 못한 상품은 이번 실행에서 하나도 저장하지 않음
+# (빈 구간 뒤의 최신 리뷰를 저장하면 기준점이 빈 구간을 지나가서 다음 실행에서도 수집 못 함)
+def skip_product(product_id, error):
+    metrics.inc("crawl_products_skipped")
+    print(f"리뷰 페이지를 받지 못해 상품 {product_id}은 다음 실행에서 다시 수집합니다 ({error})")
+
+
+# 샤드 하나를 맡은 워커: 상품을 하나씩 크롤링하고 리뷰 묶음을 emit(상품ID, 묶음)으로 넘김
+# 동시 요청 수는 워커 수 x page_window 이고 전체는 semaphore로 제한
+# 상품 하나의 페이지를 모두 받은 뒤에 넘김 (중간에 실패하면 그 상품은 건너뜀)
+async def crawl_shard(index, shard, session, sem, limiter, pages, watermarks, page_window, emit):
+    with tqdm(total=len(shard), desc=f"리뷰 크롤링 샤드 {index}", position=index, leave=False) as progress:
+        for prod in shard:
+            product_id = prod["상품ID"]
+            batches = []
+            try:
+                async for batch in iter_product_pages(session, sem, limiter, product_id, pages,
+                                                      watermarks.get(product_id), page_window):
+                    batches.append(batch)
+            except ReviewPageError as e:
+                skip_product(product_id, e)
+                batches = []
+            for batch in batches:
+                await emit(product_id, batch)
+            progress.update(1)
+
+
+def review_session(max_concurrency, per_host):
+    connector = aiohttp.TCPConnector(limit=max_concurrency, limit_per_host=per_host)
+    timeout = aiohttp.ClientTimeout(total=30)
+    return aiohttp.ClientSession(headers=HEADERS, connector=connector, timeout=timeout)
+
+
+# 샤드별 결과를 상품 순서대로 합치고 리뷰ID로 중복 제거
+def merge_reviews(products, results):
+    seen = set()
+    merged = []
+    for prod in products:
+        for review in results.get(prod["상품ID"], []):
+            if review["리뷰ID"] not in seen:
+                seen.add(review["리뷰ID"])
+                merged.append(review)
+    return merged
+
+
+# 모든 상품 리뷰를 하나의 keep-alive 세션으로 동시에 수집
+# 상품은 workers개 샤드로 나눠서 비동기 워커가 하나씩 맡음 (기본은 max_concurrency개)
+async def product_review_async(products, pages, watermarks,
+                               max_concurrency=8, per_host=4, rps=5, page_window=4, workers=None):
+    sem = asyncio.Semaphore(max_concurrency)
+    limiter = RateLimiter(rps)
+    results = {}
+
+    async def collect(product_id, batch):
+        results.setdefault(product_id, []).extend(batch)
+
+    async with review_session(max_concurrency, per_host) as session:
+        async with asyncio.TaskGroup() as tg:
+            for index, shard in enumerate(shard_products(products, workers or max_concurrency)):
+                tg.create_task(crawl_shard(index, shard, session, sem, limiter, pages, watermarks,
+                                           page_window, collect))
+
+    # 상품 순서대로 합치기 (순차 크롤링과 같은 순서)
+    return merge_reviews(products, results)
+
+
+class CrawlStopped(Exception):
+    pass
+
+
+# 리뷰 묶음을 크롤링되는 대로 돌려주는 동기 제너레이터 (스트리밍 파이프라인용)
+# - 크롤링은 전용 스레드의 이벤트 루프에서 계속 돌고, 묶음은 크기 buffer 인 스레드 안전 큐로 넘김
+# - 소비자가 느리면 큐가 차서 샤드 워커들이 put에서 기다림 (역압, 메모리 상한)
+#   put은 to_thread로 기다리므로 이벤트 루프는 멈추지 않음
+#   -> 이미 보낸 요청은 소비자가 오래 막혀 있어도 응답을 받음 (루프가 멈춰서 타임아웃 나지 않음)
+# - 소비자가 중간에 그만두면 크롤링 스레드도 종료, 크롤링 중 난 예외는 소비자 쪽에서 다시 발생
+def iter_product_review(pages=10, max_concurrency=8, per_host=4, rps=5, page_window=4, buffer=16,
+                        categories=None, top_n=4, workers=None):
+    products = product_list(categories, top_n)
+    watermarks = get_review_watermarks()
+
+    batches = queue.Queue(maxsize=buffer)
+    stop = threading.Event()
+    done = object()
+    errors = []
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+        raise CrawlStopped
+
+    async def emit(product_id, batch):
+        await asyncio.to_thread(put, batch)
+
+    async def crawl():
+        sem = asyncio.Semaphore(max_concurrency)
+        limiter = RateLimiter(rps)
+        async with review_session(max_concurrency, per_host) as session:
+            async with asyncio.TaskGroup() as tg:  # 하나가 실패하면 나머지 샤드 작업도 취소
+                for index, shard in enumerate(shard_products(products, workers or max_concurrency)):
+                    tg.create_task(crawl_shard(index, shard, session, sem, limiter, pages, watermarks,
+                                               page_window, emit))
+
+    def run():
+        try:
+            asyncio.run(crawl())
+        except BaseException as e:
+            if not stop.is_set():
+                errors.append(e)
+        finally:
+            try:
+                put(done)
+            except CrawlStopped:
+                pass
+
+    thread = threading.Thread(target=run, name="review-crawler", daemon=True)
+    thread.start()
+    try:
+        while True:
+            batch = batches.get()
+            if batch is done:
+                break
+            yield batch
+    finally:
+        stop.set()
+        thread.join()
+    if errors:
+        raise errors[0]
 
 
 # 상품 리뷰 크롤링
-def product_review(pages=10):
-    products = product_list()
-    latest_id = get_latest_review_id()
-    existing_ids = {latest_id}
+# concurrent=True 면 비동기로 상품/페이지를 동시에 요청
+# categories / top_n 으로 여러 카테고리의 베스트 상품을 한 번에 수집 (product_list 참고)
+def product_review(pages=10, concurrent=True, max_concurrency=8, per_host=4, rps=5, page_window=4,
+                   categories=None, top_n=4, workers=None):
+    products = product_list(categories, top_n)
+    watermarks = get_review_watermarks()  # 상품별 최신 리뷰 기준점
+
+    if concurrent:
+        return asyncio.run(
+            product_review_async(products, pages, watermarks,
+                                 max_concurrency=max_concurrency, per_host=per_host,
+                                 rps=rps, page_window=page_window, workers=workers)
+        )
 
     all_reviews = []
 
     for prod in products:
         product_id = prod["상품ID"]
+        watermark = watermarks.get(product_id)
+        product_reviews = []
 
         # 여러 페이지 리뷰 수집
-        for page in range(1, pages + 1):  # 1페이지부터
-            url = f"https://ohou.se/production_reviews.json?production_id={product_id}&page={page}&order=recent&photo_review_only="
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36",
-                "Sec-Fetch-Dest": "empty",
-                "Sec-Fetch-Mode": "cors",
-                "Sec-Fetch-Site": "same-origin",
-            }
-            res = requests.get(url, headers=headers)
-            try:
-                data = res.json()
-            except ValueError:
-                continue
+        try:
+            for page in range(1, pages + 1):  # 1페이지부터
+                data = fetch_review_page_sync(product_id, page)
 
-            if "reviews" not in data:
-                continue
+                stop_crawling = False
+                for r in data["reviews"]:
+                    if below_watermark(r, watermark):
+                        stop_crawling = True
+                        break
 
-            stop_crawling = False
-            for r in data["reviews"]:
-                review_id = r["id"]
-                if review_id in existing_ids:
-                    stop_crawling = True
-                    break
-
-                all_reviews.append(
-                    {
-                        "리뷰ID": review_id,
-                        "상품ID": r["production_information"]["id"],
-                        "고객ID": r["writer_id"],
-                        "고객닉네임": r["writer_nickname"],
-                        "상품옵션": r["production_information"]["explain"],
-                        "별점": r["review"]["star_avg"],
-                        "작성내용": r["review"]["comment"],
-                        "작성날짜": r["created_at"],
-                    }
-                )
-
-            if stop_crawling:
-                break  # 더 이전 페이지 리뷰 수집 중단
+                    product_reviews.append(parse_review(r))
+
+                if stop_crawling:
+                    break  # 더 이전 페이지 리뷰 수집 중단
+        except ReviewPageError as e:
+            skip_product(product_id, e)
+            continue
+        all_reviews.extend(product_reviews)
 
     return all_reviews
 
+
+# fetch_review_page 순차 버전 (requests 세션)
+def fetch_review_page_sync(product_id, page, retries=3):
+    error = None
+    for attempt in range(retries + 1):
+        if attempt:
+            metrics.inc("http_retries", target="reviews")
+            time.sleep(retry_delay(attempt - 1))
+        try:
+            res = client.get(review_url(product_id, page), "reviews")
+            data = res.json() if res.status_code == 200 else None
+        except (requests.RequestException, ValueError) as e:
+            error = type(e).__name__
+            continue
+        error = review_page_error(res.status_code, data)
+        if error is None:
+            return data
+    raise ReviewPageError(f"상품 {product_id} {page}페이지: {error}")
+
 # # crawler -> analyzer
 # # 크롤링 다음에 분석 실행하겠다 
 # import os
 
-# os.system('docker start analyzer')
\ No newline at end of file
+# os.system('docker start analyzer')
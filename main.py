@@ -1,23 +1,353 @@
-from db.db import insert_product, insert_product_review, insert_product_list, save_analyze_review
-from crawler.crawler import product_list, product_review
-from analyzer.ohou_LLM import clean_reviews, analyze_reviews
+import time
 
-# 1. 상품 목록 크롤링 + DB 저장
-insert_product(product_list())
+STARTED = time.perf_counter()
 
-# 2. 리뷰 크롤링 + DB 저장
-insert_product_review(product_review(pages=50)) 
+import argparse
+import json
 
-# 3. 상품목록 전처리 DB 저장
-insert_product_list()
+from monitor.metrics import metrics
 
-# 4. 리뷰 전처리
-inserted_reviews = clean_reviews()
+# 단계별 실행 CLI
+# 명령마다 필요한 모듈만 그 명령을 실행할 때 import 해서 시작 시간을 줄임
+# (크롤링 컨테이너는 langchain을, 분석 컨테이너는 bs4/aiohttp를 불러오지 않음)
+#
+#   python main.py                                   # 전체 스트리밍 파이프라인 (= python main.py pipeline)
+#   python main.py crawl --out crawled.jsonl         # 상품/리뷰 크롤링 -> 파일
+#   python main.py ingest crawled.jsonl              # 크롤링 결과 DB 저장 + 상품목록 전처리
+#   python main.py clean --out cleaned.jsonl         # 분석할 리뷰 조회 -> 파일
+#   python main.py analyze cleaned.jsonl             # LLM 분석 + 체크포인트 저장 (입력이 없으면 DB에서 조회)
+#   python main.py analyze --out results.jsonl       #   결과를 DB 대신 파일로 (persist 로 저장)
+#   python main.py persist results.jsonl             # 분석 결과 파일 DB 저장
+#   python main.py rollup                            # 요약 테이블 재계산 (수집/분석 저장이 멈춘 상태에서)
+#   python main.py enqueue                           # 분석할 리뷰를 작업 큐에 등록
+#   python main.py worker                            # 작업 큐 분석 worker (analyzer/worker.py)
+#   python main.py migrate
+#
+# 명령별 시작 시간(프로세스 시작 ~ 필요한 모듈 import 완료)은 startup_seconds{command} 지표로 기록
 
-# 5. LLM 분석
-all_results = analyze_reviews(inserted_reviews)
 
-# 6. 분석 결과 DB 저장 (reviewID 포함)
-save_analyze_review(all_results)
+# 명령에 필요한 모듈을 불러온 시점에 호출 (cold start 측정)
+def loaded(command):
+    seconds = time.perf_counter() - STARTED
+    metrics.set("startup_seconds", round(seconds, 3), command=command)
+    print(f"[{command}] 시작 준비 {seconds:.2f}초")
 
-print("전체 파이프라인 완료!")
+
+# DB 스키마 마이그레이션 (적용 안 된 것만)
+# DB를 쓰는 명령은 모두 실행 전에 호출해서 새 DB에서도 바로 실행되게 함 (init.sql 에 없는 테이블)
+# 여러 프로세스가 동시에 호출해도 db.migrate 가 락으로 한 곳에서만 적용
+def migrate_db():
+    from db.migrate import migrate
+
+    with metrics.stage("migrate"):
+        migrate()
+
+
+# --cascade 면 로컬 분류기(analyzer/cascade.py)를 학습해서 LLM 앞에 둠
+# 학습 데이터가 부족하면 None (전부 LLM으로 분석), DB를 읽으므로 마이그레이션 뒤에 호출
+def build_cascade(args):
+    if not args.cascade:
+        return None
+    from analyzer.cascade import LocalCascade
+
+    return LocalCascade.from_db(threshold=args.cascade_threshold, audit_rate=args.cascade_audit)
+
+
+def write_jsonl(path, rows):
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+# 단계별로 전체 결과를 만든 뒤 다음 단계로 넘기는 기존 순차 실행
+def run_sequential(pages=50, categories=None, top_n=4, enqueue=False, cascade=None):
+    from db.db import (insert_product, insert_product_review, insert_product_list, save_analyze_review,
+                       enqueue_analyze_jobs)
+    from crawler.crawler import product_list, product_review
+    from analyzer.ohou_LLM import clean_reviews, analyze_reviews
+
+    loaded("sequential")
+    # 1. 상품 목록 크롤링 + DB 저장
+    with metrics.stage("products"):
+        insert_product(product_list(categories, top_n))
+
+    # 2. 리뷰 크롤링 + DB 저장
+    with metrics.stage("crawl"):
+        reviews = product_review(pages=pages, categories=categories, top_n=top_n)
+    with metrics.stage("ingest"):
+        insert_product_review(reviews)
+
+    # 3. 상품목록 전처리 DB 저장
+    with metrics.stage("product_list"):
+        insert_product_list()
+
+    # 4. 리뷰 전처리
+    with metrics.stage("clean"):
+        inserted_reviews = clean_reviews()
+
+    # 5. 분석 작업 큐에 등록만 하고 분석은 worker에 맡김 (python main.py worker)
+    if enqueue:
+        enqueue_analyze_jobs(inserted_reviews)
+        return
+
+    # 5. LLM 분석 + 6. 분석 결과 DB 저장 (reviewID 포함)
+    # 리뷰 50개가 끝날 때마다 저장해서 중간에 멈춰도 다음 실행은 남은 리뷰만 분석
+    with metrics.stage("analyze"):
+        analyze_reviews(inserted_reviews, cascade=cascade, on_checkpoint=save_analyze_review)
+
+
+def cmd_pipeline(args):
+    top_n = args.top_n or None
+    if args.sequential:
+        migrate_db()
+        run_sequential(pages=args.pages, categories=args.categories, top_n=top_n, enqueue=args.enqueue,
+                       cascade=build_cascade(args))
+        return
+
+    from pipeline import run_pipeline
+
+    loaded("pipeline")
+    migrate_db()
+    # 크롤링하는 동안 저장/분석/결과 저장을 같이 진행
+    run_pipeline(pages=args.pages, queue_size=args.queue_size, analyze_chunk=args.analyze_chunk,
+                 categories=args.categories, top_n=top_n, enqueue=args.enqueue,
+                 analyze_options={"concurrency": 8, "batch_size": 20, "cascade": build_cascade(args)})
+
+
+# 상품 + 리뷰 크롤링 -> JSON lines ({"product": ...} / {"review": ...})
+# 리뷰는 크롤링되는 대로 파일에 씀
+def cmd_crawl(args):
+    from crawler.crawler import product_list, iter_product_review
+
+    loaded("crawl")
+    migrate_db()
+    top_n = args.top_n or None
+
+    def rows():
+        for product in product_list(args.categories, top_n):
+            yield {"product": product}
+        for batch in iter_product_review(pages=args.pages, categories=args.categories, top_n=top_n):
+            for review in batch:
+                yield {"review": review}
+
+    with metrics.stage("crawl"):
+        count = write_jsonl(args.out, rows())
+    print(f"크롤링 완료! {count}행 -> {args.out}")
+
+
+def cmd_ingest(args):
+    from db.db import insert_product, insert_product_review, insert_product_list
+
+    loaded("ingest")
+    migrate_db()
+    products, reviews = [], []
+    for row in read_jsonl(args.input):
+        if "product" in row:
+            products.append(row["product"])
+        else:
+            reviews.append(row["review"])
+
+    with metrics.stage("ingest"):
+        insert_product(products)
+        insert_product_review(reviews)
+        insert_product_list()
+
+
+# 분석할 리뷰 -> JSON lines [reviewID, 내용, productID]
+def cmd_clean(args):
+    from analyzer.ohou_LLM import iter_clean_reviews
+
+    loaded("clean")
+    migrate_db()
+    with metrics.stage("clean"):
+        count = write_jsonl(args.out, iter_clean_reviews(incremental=not args.all))
+    print(f"제거완료, 분석할 리뷰 수 {count}개 -> {args.out}")
+
+
+def cmd_analyze(args):
+    from analyzer.ohou_LLM import clean_reviews, analyze_reviews
+    from db.db import save_analyze_review
+
+    loaded("analyze")
+    migrate_db()
+    on_checkpoint = save_analyze_review
+    if args.out:
+        out = open(args.out, "w", encoding="utf-8")
+
+        # 체크포인트마다 결과와 완료 리뷰를 한 줄로 기록 (persist 가 같은 단위로 저장)
+        def on_checkpoint(rows, done_reviews):
+            out.write(json.dumps({"rows": rows, "done": done_reviews}, ensure_ascii=False) + "\n")
+            out.flush()
+
+    if args.input:
+        inserted_reviews = [tuple(review) for review in read_jsonl(args.input)]
+    else:
+        inserted_reviews = clean_reviews()
+
+    try:
+        with metrics.stage("analyze"):
+            analyze_reviews(inserted_reviews, batch_size=args.batch_size or None,
+                            concurrency=args.concurrency or None, cascade=build_cascade(args),
+                            on_checkpoint=on_checkpoint)
+    finally:
+        if args.out:
+            out.close()
+
+
+def cmd_persist(args):
+    from db.db import save_analyze_review
+
+    loaded("persist")
+    migrate_db()
+    with metrics.stage("persist"):
+        for checkpoint in read_jsonl(args.input):
+            save_analyze_review(checkpoint["rows"], done_reviews=[tuple(done) for done in checkpoint["done"]])
+
+
+def cmd_rollup(args):
+    from db.db import rebuild_rollups
+
+    loaded("rollup")
+    migrate_db()
+    with metrics.stage("rollup"):
+        rebuild_rollups()
+
+
+def cmd_enqueue(args):
+    from db.db import enqueue_analyze_jobs
+    from analyzer.ohou_LLM import clean_reviews
+
+    loaded("enqueue")
+    migrate_db()
+    with metrics.stage("enqueue"):
+        enqueue_analyze_jobs(clean_reviews())
+
+
+def cmd_worker(args):
+    from analyzer.worker import run_worker
+
+    loaded("worker")
+    migrate_db()
+    run_worker(args.batch, args.lease, args.max_attempts, args.poll, args.exit_when_empty,
+               {"concurrency": args.concurrency, "batch_size": args.llm_batch_size,
+                "cascade": build_cascade(args)})
+
+
+def cmd_migrate(args):
+    loaded("migrate")
+    migrate_db()
+
+
+# 옵션 기본값 (suppress=True 면 기본값을 두지 않음)
+# pipeline 서브커맨드는 최상위 파서와 같은 옵션을 받는데, 서브커맨드 기본값이 있으면
+# "python main.py --pages 5 pipeline" 에서 앞에 준 값을 덮어쓰므로 서브커맨드 쪽은 기본값 없이 등록
+def default(value, suppress=False):
+    return argparse.SUPPRESS if suppress else value
+
+
+def add_crawl_options(parser, suppress=False):
+    parser.add_argument("--pages", type=int, default=default(50, suppress), help="상품별 최대 리뷰 페이지 수")
+    parser.add_argument("--categories", type=lambda value: [int(c) for c in value.split(",")],
+                        default=default(None, suppress),
+                        help="크롤링할 카테고리ID 목록 (쉼표로 구분, 기본 18000000)")
+    parser.add_argument("--top-n", type=int, default=default(4, suppress),
+                        help="카테고리별 베스트 상품 수 (0이면 랭킹 전체)")
+
+
+def add_cascade_options(parser, suppress=False):
+    parser.add_argument("--cascade", action="store_true", default=default(False, suppress),
+                        help="로컬 분류기가 확신하는 문장은 LLM을 호출하지 않음 (기존 분석 결과로 학습)")
+    parser.add_argument("--cascade-threshold", type=float, default=default(0.95, suppress),
+                        help="로컬 결과를 쓸 최소 확률")
+    parser.add_argument("--cascade-audit", type=float, default=default(0.05, suppress),
+                        help="로컬 결과가 있어도 LLM으로 검증할 비율")
+
+
+def add_pipeline_options(parser, suppress=False):
+    add_crawl_options(parser, suppress)
+    add_cascade_options(parser, suppress)
+    parser.add_argument("--sequential", action="store_true", default=default(False, suppress),
+                        help="단계를 하나씩 순서대로 실행")
+    parser.add_argument("--enqueue", action="store_true", default=default(False, suppress),
+                        help="분석하지 않고 분석 작업 큐에 등록 (worker 컨테이너가 처리)")
+    parser.add_argument("--queue-size", type=int, default=default(4, suppress),
+                        help="파이프라인 단계 사이 큐 크기 (묶음 수)")
+    parser.add_argument("--analyze-chunk", type=int, default=default(200, suppress),
+                        help="LLM 분석/저장 묶음 크기 (리뷰 수)")
+
+
+parser = argparse.ArgumentParser()
+add_pipeline_options(parser)
+commands = parser.add_subparsers(dest="command")
+parser.set_defaults(handler=cmd_pipeline, command="pipeline")
+
+command = commands.add_parser("pipeline", help="전체 파이프라인 (기본)")
+add_pipeline_options(command, suppress=True)
+command.set_defaults(handler=cmd_pipeline)
+
+command = commands.add_parser("crawl", help="상품/리뷰 크롤링 -> JSON lines")
+add_crawl_options(command)
+command.add_argument("--out", required=True)
+command.set_defaults(handler=cmd_crawl)
+
+command = commands.add_parser("ingest", help="크롤링 결과 DB 저장")
+command.add_argument("input")
+command.set_defaults(handler=cmd_ingest)
+
+command = commands.add_parser("clean", help="분석할 리뷰 -> JSON lines")
+command.add_argument("--out", required=True)
+command.add_argument("--all", action="store_true", help="이미 분석한 리뷰도 포함")
+command.set_defaults(handler=cmd_clean)
+
+command = commands.add_parser("analyze", help="LLM 분석")
+command.add_argument("input", nargs="?", help="clean 결과 (없으면 DB에서 분석 안 된 리뷰 조회)")
+command.add_argument("--out", help="결과를 DB 대신 JSON lines로 저장 (persist 로 저장)")
+command.add_argument("--concurrency", type=int, default=8, help="LLM 동시 요청 수 (0이면 순차)")
+command.add_argument("--batch-size", type=int, default=20, help="프롬프트 하나에 묶을 문장 수 (0이면 문장별)")
+add_cascade_options(command)
+command.set_defaults(handler=cmd_analyze)
+
+command = commands.add_parser("persist", help="analyze --out 결과 DB 저장")
+command.add_argument("input")
+command.set_defaults(handler=cmd_persist)
+
+command = commands.add_parser("rollup", help="요약 테이블 재계산")
+command.set_defaults(handler=cmd_rollup)
+
+command = commands.add_parser("enqueue", help="분석할 리뷰를 작업 큐에 등록")
+command.set_defaults(handler=cmd_enqueue)
+
+command = commands.add_parser("worker", help="분석 작업 큐 worker")
+command.add_argument("--batch", type=int, default=50, help="한 번에 가져올 작업(리뷰) 수")
+command.add_argument("--lease", type=int, default=600, help="작업 점유 시간 (초), 지나면 다른 worker가 회수")
+command.add_argument("--max-attempts", type=int, default=3)
+command.add_argument("--poll", type=float, default=10, help="큐가 비었을 때 다시 확인하는 간격 (초)")
+command.add_argument("--exit-when-empty", action="store_true", help="큐가 비면 종료")
+command.add_argument("--concurrency", type=int, default=8, help="LLM 동시 요청 수")
+command.add_argument("--llm-batch-size", type=int, default=20, help="프롬프트 하나에 묶을 문장 수")
+add_cascade_options(command)
+command.set_defaults(handler=cmd_worker)
+
+command = commands.add_parser("migrate", help="DB 스키마 마이그레이션")
+command.set_defaults(handler=cmd_migrate)
+
+args = parser.parse_args()
+try:
+    args.handler(args)
+finally:
+    # 실패한 실행도 어디서 시간을 썼는지 남김 (METRICS_DIR/{명령}.json, {명령}.prom)
+    # worker 는 worker별 리포트를 따로 남김
+    if args.command != "worker":
+        metrics.write_report(name="pipeline" if args.command == "pipeline" else args.command)
+
+print(f"{args.command} 완료!")
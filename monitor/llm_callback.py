@@ -0,0 +1,47 @@
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from monitor.metrics import metrics
+
+
+# LangChain 콜백으로 LLM 호출 지연시간과 토큰 사용량 기록
+# - llm_call_seconds{model, status}
+# - llm_tokens_total{model, kind=prompt|completion}
+class LLMMetricsHandler(BaseCallbackHandler):
+    run_inline = True  # 비동기 호출에서도 스레드 풀로 넘기지 않고 바로 실행
+
+    def __init__(self, model):
+        self.model = model
+        self.started = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self.started[run_id] = time.perf_counter()
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self.started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self.finish(run_id, "ok")
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens")
+        completion_tokens = usage.get("completion_tokens")
+        if prompt_tokens is None:
+            # llm_output이 없는 버전은 메시지의 usage_metadata 사용
+            prompt_tokens = completion_tokens = 0
+            for generations in response.generations:
+                for generation in generations:
+                    meta = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                    prompt_tokens += meta.get("input_tokens", 0)
+                    completion_tokens += meta.get("output_tokens", 0)
+        metrics.inc("llm_tokens", prompt_tokens, model=self.model, kind="prompt")
+        metrics.inc("llm_tokens", completion_tokens or 0, model=self.model, kind="completion")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self.finish(run_id, "error")
+        metrics.inc("llm_errors", model=self.model, error=type(error).__name__)
+
+    def finish(self, run_id, status):
+        started = self.started.pop(run_id, None)
+        if started is not None:
+            metrics.observe("llm_call_seconds", time.perf_counter() - started, model=self.model, status=status)
@@ -0,0 +1,185 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+# 파이프라인 계측 (HTTP / DB / LLM 지연시간, 단계별 시간, 토큰/재시도/캐시 카운터)
+# 프로세스 하나에 metrics 하나를 두고 각 모듈이 여기에 기록
+# 실행이 끝나면 write_report()로 JSON 리포트 + Prometheus textfile 저장
+
+# 지연시간 히스토그램 버킷 (초)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{v}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    # 버킷으로 어림한 분위수
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "avg": round(self.sum / self.count, 6) if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "max": round(self.max, 6),
+        }
+
+
+class Metrics:
+    def __init__(self, prefix="ohou"):
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.histograms = {}  # 이름 -> {라벨: Histogram}
+        self.counters = {}    # 이름 -> {라벨: 값}
+        self.gauges = {}      # 이름 -> {라벨: 값}
+        self.labels = ()      # 모든 시계열에 붙는 라벨 (set_labels)
+        self.started = time.time()
+
+    # 프로세스 공통 라벨 (예: worker 이름)
+    # 여러 프로세스의 .prom 파일을 한 textfile collector가 읽어도 시계열이 겹치지 않게 함
+    def set_labels(self, **labels):
+        self.labels = label_key(labels)
+
+    def observe(self, name, value, **labels):
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            key = label_key(labels)
+            if key not in series:
+                series[key] = Histogram()
+            series[key].observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            key = label_key(labels)
+            series[key] = series.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        with self.lock:
+            self.gauges.setdefault(name, {})[label_key(labels)] = value
+
+    # 블록 실행 시간을 히스토그램에 기록
+    @contextmanager
+    def timer(self, name, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    # 단계 전체 실행 시간 (stage_seconds 게이지)
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.set("stage_seconds", time.perf_counter() - started, stage=name)
+
+    def snapshot(self):
+        with self.lock:
+            def series(values, convert):
+                return {
+                    name: [{"labels": dict(key), "value": convert(value)} for key, value in items.items()]
+                    for name, items in values.items()
+                }
+            return {
+                "labels": dict(self.labels),
+                "started_at": self.started,
+                "elapsed_seconds": round(time.time() - self.started, 3),
+                "gauges": series(self.gauges, lambda v: v),
+                "counters": series(self.counters, lambda v: v),
+                "histograms": series(self.histograms, Histogram.summary),
+            }
+
+    # Prometheus text exposition format (node_exporter textfile collector용)
+    def to_prometheus(self):
+        lines = []
+        with self.lock:
+            for name, items in sorted(self.gauges.items()):
+                full = f"{self.prefix}_{name}"
+                lines.append(f"# TYPE {full} gauge")
+                for key, value in items.items():
+                    lines.append(f"{full}{format_labels(self.labels + key)} {value}")
+            for name, items in sorted(self.counters.items()):
+                full = f"{self.prefix}_{name}_total"
+                lines.append(f"# TYPE {full} counter")
+                for key, value in items.items():
+                    lines.append(f"{full}{format_labels(self.labels + key)} {value}")
+            for name, items in sorted(self.histograms.items()):
+                full = f"{self.prefix}_{name}"
+                lines.append(f"# TYPE {full} histogram")
+                for key, hist in items.items():
+                    cumulative = 0
+                    for bound, count in zip(hist.buckets, hist.counts):
+                        cumulative += count
+                        lines.append(f"{full}_bucket{format_labels(self.labels + key, [('le', bound)])} {cumulative}")
+                    lines.append(f"{full}_bucket{format_labels(self.labels + key, [('le', '+Inf')])} {hist.count}")
+                    lines.append(f"{full}_sum{format_labels(self.labels + key)} {hist.sum}")
+                    lines.append(f"{full}_count{format_labels(self.labels + key)} {hist.count}")
+        lines.append(f"# TYPE {self.prefix}_last_run_timestamp_seconds gauge")
+        lines.append(f"{self.prefix}_last_run_timestamp_seconds{format_labels(self.labels)} {time.time()}")
+        return "\n".join(lines) + "\n"
+
+    # METRICS_DIR(기본 metrics/)에 JSON 리포트와 .prom 파일 저장
+    # textfile collector가 쓰다 만 파일을 읽지 않도록 임시 파일에 쓴 뒤 rename
+    # 오래 도는 프로세스(worker)는 주기적으로 호출해서 덮어씀 (verbose=False 면 출력 안 함)
+    def write_report(self, directory=None, name="pipeline", verbose=True):
+        directory = directory or os.getenv("METRICS_DIR", "metrics")
+        os.makedirs(directory, exist_ok=True)
+        outputs = {
+            os.path.join(directory, f"{name}.json"):
+                json.dumps(self.snapshot(), ensure_ascii=False, indent=2),
+            os.path.join(directory, f"{name}.prom"): self.to_prometheus(),
+        }
+        for path, content in outputs.items():
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(tmp, path)
+        if verbose:
+            print(f"실행 지표 저장 완료! ({', '.join(outputs)})")
+        return list(outputs)
+
+
+metrics = Metrics()
@@ -0,0 +1,210 @@
+import queue
+import threading
+import time
+
+from db.db import (insert_product, insert_product_review, insert_product_list, save_analyze_review,
+                   enqueue_analyze_jobs)
+from crawler.crawler import product_list, iter_product_review
+from analyzer.ohou_LLM import iter_clean_reviews, iter_clean_review_pages, analyze_reviews, get_cache
+from monitor.metrics import metrics
+
+
+# 스트리밍 파이프라인
+# 크롤링 → 리뷰 저장 → 전처리 → LLM 분석 → 결과 저장 단계를 스레드로 동시에 돌리고
+# 단계 사이를 크기 제한 큐로 연결 (다음 단계가 밀리면 앞 단계가 put에서 기다림 = 역압)
+# 메모리는 데이터 전체가 아니라 큐 크기 x 묶음 크기로 제한됨
+
+DONE = object()  # 앞 단계가 끝났다는 신호
+
+
+class PipelineStopped(Exception):
+    pass
+
+
+# 단계 하나 (입력 큐에서 꺼내 처리하고 결과를 출력 큐에 넣음)
+# - process(item): 출력 묶음들을 yield
+# - finish(): 입력이 끝난 뒤 추가로 내보낼 묶음들을 yield (없으면 None)
+class Stage:
+    def __init__(self, name, process, finish=None):
+        self.name = name
+        self.process = process
+        self.finish = finish
+        self.items = 0
+        self.outputs = 0
+        self.busy = 0.0
+
+
+class Pipeline:
+    def __init__(self, queue_size=4, poll=0.5):
+        self.queue_size = queue_size
+        self.poll = poll
+        self.stop = threading.Event()
+        self.errors = []
+        self.stages = []
+
+    # 다른 단계가 실패하면 기다리던 put/get도 빠져나오도록 poll 간격으로 확인
+    def put(self, q, item):
+        while not self.stop.is_set():
+            try:
+                q.put(item, timeout=self.poll)
+                return
+            except queue.Full:
+                continue
+        raise PipelineStopped
+
+    def get(self, q):
+        while not self.stop.is_set():
+            try:
+                return q.get(timeout=self.poll)
+            except queue.Empty:
+                continue
+        raise PipelineStopped
+
+    def add(self, name, process, finish=None):
+        self.stages.append(Stage(name, process, finish))
+        return self
+
+    def emit(self, stage, outputs, out_q):
+        started = time.perf_counter()
+        for output in outputs:
+            stage.busy += time.perf_counter() - started
+            stage.outputs += 1
+            if out_q is not None:
+                self.put(out_q, output)
+            started = time.perf_counter()
+        stage.busy += time.perf_counter() - started
+
+    def work(self, stage, in_q, out_q):
+        try:
+            if in_q is None:  # 첫 단계 (소스)
+                self.emit(stage, stage.process(None), out_q)
+            else:
+                while True:
+                    item = self.get(in_q)
+                    if item is DONE:
+                        break
+                    stage.items += 1
+                    self.emit(stage, stage.process(item), out_q)
+            if stage.finish:
+                self.emit(stage, stage.finish(), out_q)
+            if out_q is not None:
+                self.put(out_q, DONE)
+        except PipelineStopped:
+            pass
+        except BaseException as e:
+            self.errors.append((stage.name, e))
+            self.stop.set()
+
+    def run(self):
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages[1:]]
+        threads = []
+        for i, stage in enumerate(self.stages):
+            in_q = queues[i - 1] if i > 0 else None
+            out_q = queues[i] if i < len(queues) else None
+            thread = threading.Thread(target=self.work, args=(stage, in_q, out_q),
+                                      name=f"pipeline-{stage.name}", daemon=True)
+            thread.start()
+            threads.append(thread)
+
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(self.poll)
+        except KeyboardInterrupt:
+            self.stop.set()
+            raise
+
+        for stage in self.stages:
+            metrics.set("stage_busy_seconds", stage.busy, stage=stage.name)
+            metrics.inc("stage_batches", stage.items, stage=stage.name)
+            print(f"[{stage.name}] 입력 {stage.items}묶음, 출력 {stage.outputs}묶음, 처리 시간 {stage.busy:.1f}초")
+        if self.errors:
+            name, error = self.errors[0]
+            raise RuntimeError(f"파이프라인 '{name}' 단계 실패") from error
+
+
+# 리뷰를 chunk_size 개씩 묶기
+def rebatch(batches, chunk_size):
+    chunk = []
+    for batch in batches:
+        chunk.extend(batch)
+        while len(chunk) >= chunk_size:
+            yield chunk[:chunk_size]
+            chunk = chunk[chunk_size:]
+    if chunk:
+        yield chunk
+
+
+# 전체 파이프라인을 스트리밍으로 실행
+# - review_chunk: 리뷰 저장/전처리 묶음 크기
+# - analyze_chunk: LLM 분석 → 저장 묶음 크기 (저장 단위가 되므로 너무 크지 않게)
+# - queue_size: 단계 사이 큐에 쌓일 수 있는 묶음 수
+# - categories / top_n: 크롤링할 카테고리와 카테고리별 베스트 상품 수 (crawler.product_list)
+# - enqueue=True 면 분석하지 않고 분석 작업 큐에 등록 (analyzer/worker.py 가 처리)
+def run_pipeline(pages=50, review_chunk=500, analyze_chunk=200, queue_size=4,
+                 categories=None, top_n=4, crawl_options=None, analyze_options=None, enqueue=False):
+    crawl_options = crawl_options or {}
+    analyze_options = analyze_options or {"concurrency": 8, "batch_size": 20}
+
+    # 상품 목록은 작아서 먼저 저장 (리뷰 저장/분석 결과 저장이 상품 테이블을 참조)
+    with metrics.stage("products"):
+        insert_product(product_list(categories, top_n))
+        insert_product_list()
+
+    dispatched = set()  # 분석 단계로 넘긴 리뷰ID (남은 리뷰 정리 때 제외)
+
+    def crawl(_):
+        batches = iter_product_review(pages=pages, categories=categories, top_n=top_n, **crawl_options)
+        yield from rebatch(batches, review_chunk)
+
+    def ingest(reviews):
+        insert_product_review(reviews, chunk_size=review_chunk)
+        yield [review["리뷰ID"] for review in reviews]
+
+    def clean(review_ids):
+        reviews = list(iter_clean_reviews(review_ids=review_ids))
+        dispatched.update(rid for rid, _, _ in reviews)
+        yield from rebatch([reviews], analyze_chunk)
+
+    # 이번에 크롤링하지 않았지만 아직 분석 안 된 리뷰 (이전 실행에서 밀린 것)
+    # 분석 큐가 차서 오래 기다릴 수 있으므로 스트리밍 커서 대신 페이지 단위로 조회
+    def clean_backlog():
+        for page in iter_clean_review_pages(page_size=analyze_chunk):
+            backlog = [review for review in page if review[0] not in dispatched]
+            if backlog:
+                dispatched.update(rid for rid, _, _ in backlog)
+                yield backlog
+
+    # 묶음 하나가 체크포인트 단위 (결과 저장과 같은 트랜잭션에서 리뷰별 완료 기록)
+    def analyze(reviews):
+        results = analyze_reviews(reviews, report=False, **analyze_options)
+        yield results, [(rid, productID) for rid, _, productID in reviews]
+
+    def persist(checkpoint):
+        results, done_reviews = checkpoint
+        save_analyze_review(results, done_reviews=done_reviews)
+        return ()
+
+    def enqueue_jobs(reviews):
+        enqueue_analyze_jobs(reviews)
+        return ()
+
+    pipeline = (
+        Pipeline(queue_size=queue_size)
+        .add("crawl", crawl)
+        .add("ingest", ingest)
+        .add("clean", clean, finish=clean_backlog)
+    )
+    if enqueue:
+        pipeline.add("enqueue", enqueue_jobs)
+    else:
+        pipeline.add("analyze", analyze).add("persist", persist)
+    try:
+        with metrics.stage("pipeline"):
+            pipeline.run()
+    finally:
+        if not enqueue and analyze_options.get("use_cache", True):
+            get_cache().report()
+        cascade = analyze_options.get("cascade")
+        if cascade:
+            cascade.report()
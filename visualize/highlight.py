@@ -0,0 +1,106 @@
+import html
+from collections import deque
+from functools import lru_cache
+
+# 하이라이트 단위를 나누는 문자 (문자는 앞 조각에 포함)
+SEPARATORS = frozenset(".!?,\n")
+SPAN = "<span style='background-color:{}; color:#000; padding:1px 2px; border-radius:2px;'>{}</span>"
+
+
+# 여러 키워드를 한 번에 찾는 Aho-Corasick 오토마톤
+class KeywordMatcher:
+    def __init__(self, keywords):
+        self.keywords = [kw for kw in dict.fromkeys(keywords) if kw]
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [()]
+
+        for kw in self.keywords:
+            state = 0
+            for ch in kw:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(())
+                state = nxt
+            self.output[state] = self.output[state] + (kw,)
+
+        # 실패 링크 (BFS), 실패 상태의 출력도 합쳐둠
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0) if self.goto[f].get(ch) != nxt else 0
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+
+    # 텍스트를 조각으로 나누면서 조각마다 포함된 키워드 집합을 함께 반환 (한 번의 선형 탐색)
+    # 키워드는 조각 경계를 넘어서 매칭되지 않음
+    def scan(self, text):
+        goto, fail, output = self.goto, self.fail, self.output
+        fragments = []
+        start = 0
+        state = 0
+        found = set()
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if output[state]:
+                found.update(output[state])
+            if ch in SEPARATORS:
+                fragments.append((text[start:i + 1], found))
+                start = i + 1
+                state = 0
+                found = set()
+        fragments.append((text[start:], found))
+        return fragments
+
+
+@lru_cache(maxsize=512)
+def get_matcher(keywords):
+    return KeywordMatcher(keywords)
+
+
+# 리뷰 하이라이팅 함수
+# 마침표/느낌표/물음표/쉼표/줄바꿈으로 나눈 조각에 키워드가 있으면
+# substrings 순서상 가장 앞의 키워드 색으로 조각 전체를 칠함
+# matcher를 주면 (상품, 카테고리)별로 미리 만든 오토마톤을 재사용
+def highlight_multiple_substrings(text, substrings, colors, matcher=None):
+    pairs = list(zip(substrings, colors))
+    if matcher is None:
+        matcher = get_matcher(tuple(substr for substr, _ in pairs))
+
+    priority = {}
+    for i, (substr, _) in enumerate(pairs):
+        priority.setdefault(substr, i)
+    empty_priority = priority.get("")
+
+    result = []
+    for part, found in matcher.scan(text):
+        part_html = html.escape(part).replace('\n', '<br>')
+
+        # 빈 문자열이나 공백만 있는 경우 건너뛰기
+        if not part.strip():
+            result.append(part_html)
+            continue
+
+        best = empty_priority
+        for kw in found:
+            i = priority.get(kw)
+            if i is not None and (best is None or i < best):
+                best = i
+
+        color_to_use = pairs[best][1] if best is not None else None
+        if color_to_use:
+            result.append(SPAN.format(color_to_use, part_html))
+        else:
+            result.append(part_html)
+
+    return "".join(result)
@@ -6,31 +6,37 @@ import streamlit as st
 import re
 import pandas as pd
 import matplotlib.pyplot as plt
-from db.db import dbcon
+from db.db import get_conn, get_data_version as read_data_version
+from visualize.ohou_charts import FigureCache, sentiment_pie_png, keyword_bar_png
+from visualize.highlight import get_matcher, highlight_multiple_substrings
 
 plt.rcParams['font.family'] = 'NanumGothic' 
-dbcon()
 
 
 st.set_page_config('오늘의 집 리뷰 분석','🏠',layout="wide")
 
+# 데이터 버전 (상품/리뷰 수집, 분석 결과 저장 때마다 올라감)
+# 조회 함수들은 버전을 캐시 키에 포함해서, 버전이 바뀌면 자동으로 다시 조회
+@st.cache_data(ttl=30, show_spinner=False)
+def get_data_version():
+    return read_data_version()
+
+
 # 상품 목록 불러오기 함수
-def get_products():
-    conn = dbcon()
-    try:
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_products(version):
+    with get_conn() as conn:
         with conn.cursor() as cur:
             cur.execute("SELECT productID, clean_name FROM tb_analyze_products")
             rows = cur.fetchall()
             df = pd.DataFrame(rows, columns=["productID", "productName"])
         return df
-    finally:
-        conn.close()
 
 
 # 선택된 상품의 리뷰 불러오기 함수
-def get_reviews(product_id):
-    conn = dbcon()
-    try:
+@st.cache_data(ttl=600, show_spinner=False)
+def get_reviews(version, product_id):
+    with get_conn() as conn:
         with conn.cursor() as cur:
             cur.execute("""
                 SELECT r.reviewID, r.nickname, r.grade, r.comment, r.event_date
@@ -42,17 +48,15 @@ def get_reviews(product_id):
             rows = cur.fetchall()
             df = pd.DataFrame(rows, columns=["reviewID", "nickname", "grade", "comment", "event_date"])
         return df
-    finally:
-        conn.close()
 
 
 # 선택된 상품이 있으면 평점과 리뷰 수 계산
-def get_rating_and_count(product_id):
-    conn = dbcon()
-    try:
+@st.cache_data(ttl=600, show_spinner=False)
+def get_rating_and_count(version, product_id):
+    with get_conn() as conn:
         with conn.cursor() as cur:
             cur.execute(
-                "SELECT AVG(grade), COUNT(*) FROM tb_reviews WHERE goodsID=%s",
+                "SELECT grade_sum / review_count, review_count FROM tb_product_summary WHERE productID=%s",
                 (product_id,)
             )
             result = cur.fetchone()
@@ -62,58 +66,48 @@ def get_rating_and_count(product_id):
                 return avg_grade, review_count
             else:
                 return 0, 0
-    finally:
-        conn.close()
 
 # 선택한 상품의 리뷰 키워드 카운드 
-def get_keyword_count(product_id):
-    conn=dbcon()
-    try:
+@st.cache_data(ttl=600, show_spinner=False)
+def get_keyword_count(version, product_id):
+    with get_conn() as conn:
         with conn.cursor() as cur:
             cur.execute(
                 "SELECT keyword, sum(count) as co FROM tb_keywords WHERE productID=%s GROUP BY keyword ORDER BY co DESC LIMIT 10", (product_id,))
             rows = cur.fetchall()
             df = pd.DataFrame(rows, columns=["keyword", "count"])
         return df
-    finally:
-        conn.close()
 
 # 카테고리 가져오기
-def get_categories():
-    conn = dbcon()
-    try:
+@st.cache_data(ttl=86400, show_spinner=False)
+def get_categories(version):
+    with get_conn() as conn:
         with conn.cursor() as cur:
             cur.execute("SELECT categoryID, category FROM tb_categories ORDER BY categoryID")
             rows = cur.fetchall()
             return rows 
-    finally:
-        conn.close()
 
 # 긍정 부정 카운트 
-def get_sentiment_count(product_id, category_id):
-    conn = dbcon()
-    try:
+@st.cache_data(ttl=600, show_spinner=False)
+def get_sentiment_count(version, product_id, category_id):
+    with get_conn() as conn:
         with conn.cursor() as cur:
             cur.execute("""
-                SELECT a.sentiment, COUNT(DISTINCT a.reviewID) AS cnt
-                FROM tb_analyze a
-                JOIN tb_keywords k
-                  ON k.productID = a.productID
-                 AND k.categoryID = %s
-                WHERE a.productID = %s
-                  AND a.sentence LIKE CONCAT('%%', k.keyword, '%%')
-                GROUP BY a.sentiment
-            """, (category_id, product_id))  # ← 순서 주의: (category_id, product_id)
+                SELECT sentiment, review_count
+                FROM tb_sentiment_rollup
+                WHERE productID = %s
+                  AND categoryID = %s
+                  AND review_count > 0
+                ORDER BY sentiment
+            """, (product_id, category_id))
             rows = cur.fetchall()
             df = pd.DataFrame(rows, columns=["sentiment", "count"])
         return df
-    finally:
-        conn.close()
 
 # 키워드 카테고리 
-def get_keyword_count_by_category(product_id, category_id):
-    conn = dbcon()
-    try:
+@st.cache_data(ttl=600, show_spinner=False)
+def get_keyword_count_by_category(version, product_id, category_id):
+    with get_conn() as conn:
         with conn.cursor() as cur:
             cur.execute("""
                 SELECT keyword, SUM(count) as cnt
@@ -126,106 +120,52 @@ def get_keyword_count_by_category(product_id, category_id):
             rows = cur.fetchall()
         df = pd.DataFrame(rows, columns=["keyword", "count"])
         return df
-    finally:
-        conn.close()
 
 # 리뷰 가져오기 
-def get_reviews_by_category(product_id, category_id, limit=5):
-    conn = dbcon()
-    try:
+@st.cache_data(ttl=600, show_spinner=False)
+def get_reviews_by_category(version, product_id, category_id, limit=5):
+    with get_conn() as conn:
         with conn.cursor() as cur:
             # 리뷰 + 키워드 같이 가져오기
             cur.execute("""
                 SELECT 
                     r.reviewID, r.nickname, r.grade, r.comment, r.event_date,
                     GROUP_CONCAT(DISTINCT k.keyword) AS keywords
-                FROM tb_reviews r
-                JOIN tb_analyze a 
-                  ON a.productID = r.goodsID
-                 AND a.reviewID  = r.reviewID
-                JOIN tb_keywords k
-                  ON k.productID = a.productID
-                 AND k.categoryID = %s
-                WHERE a.productID = %s
-                  AND a.sentence LIKE CONCAT('%%', k.keyword, '%%')
+                FROM tb_analyze_keywords ak
+                JOIN tb_analyze a ON a.analyzeID = ak.analyzeID
+                JOIN tb_keywords k ON k.keyword_id = ak.keyword_id
+                JOIN tb_reviews r
+                  ON r.reviewID = a.reviewID
+                 AND r.goodsID  = a.productID
+                WHERE ak.productID = %s
+                  AND ak.categoryID = %s
                 GROUP BY r.reviewID, r.nickname, r.grade, r.comment, r.event_date
                 ORDER BY r.event_date DESC
                 LIMIT %s
-            """, (category_id, product_id, limit))
+            """, (product_id, category_id, limit))
             rows = cur.fetchall()
             df = pd.DataFrame(rows, columns=["reviewID", "nickname", "grade", "comment", "event_date", "keywords"])
         return df
-    finally:
-        conn.close()
 
 
 # 카테고리에 해당하는 키워드 가져오기 
-def get_keywords_by_sentiment(product_id, category_id):
-    conn = dbcon()
-    try:
+@st.cache_data(ttl=600, show_spinner=False)
+def get_keywords_by_sentiment(version, product_id, category_id):
+    with get_conn() as conn:
         with conn.cursor() as cur:
             cur.execute("""
-                SELECT k.keyword, a.sentiment, COUNT(*) AS hits
-                FROM tb_analyze a
-                JOIN tb_keywords k
-                  ON k.productID = a.productID
-                 AND k.categoryID = %s
-                WHERE a.productID = %s
-                  AND a.sentence LIKE CONCAT('%%', k.keyword, '%%')
-                GROUP BY k.keyword, a.sentiment
-                ORDER BY hits DESC
-            """, (category_id, product_id))
+                SELECT k.keyword, kr.sentiment, kr.hits
+                FROM tb_keyword_rollup kr
+                JOIN tb_keywords k ON k.keyword_id = kr.keyword_id
+                WHERE kr.productID = %s
+                  AND kr.categoryID = %s
+                ORDER BY kr.hits DESC
+            """, (product_id, category_id))
             rows = cur.fetchall()
             df = pd.DataFrame(rows, columns=["keyword", "sentiment", "hits"])
         return df
-    finally:
-        conn.close()
 
 
-# 리뷰 하이라이팅 함수
-def highlight_multiple_substrings(text, substrings, colors):
-    import html
-    import re
-    
-    # 더 세밀한 단위로 분리: 마침표, 느낌표, 물음표, 쉼표, 줄바꿈 기준
-    parts = re.split(r'([.!?,\n])', text)
-    
-    # 분리된 부분을 다시 합치면서 원래 형태 유지
-    full_parts = []
-    for i in range(0, len(parts), 2):
-        if i + 1 < len(parts):
-            full_parts.append(parts[i] + parts[i + 1])
-        else:
-            full_parts.append(parts[i])
-    
-    result = ""
-    
-    for part in full_parts:
-        # 빈 문자열이나 공백만 있는 경우 건너뛰기
-        if not part.strip():
-            result += html.escape(part).replace('\n', '<br>')
-            continue
-            
-        part_colored = False
-        color_to_use = None
-        
-        # 각 키워드가 해당 부분에 포함되어 있는지 확인
-        for substr, color in zip(substrings, colors):
-            if substr in part:
-                part_colored = True
-                color_to_use = color
-                break
-        
-        if part_colored and color_to_use:
-            # 해당 부분에서 \n을 <br>로 변경하여 줄바꿈 유지
-            part_html = html.escape(part).replace('\n', '<br>')
-            result += f"<span style='background-color:{color_to_use}; color:#000; padding:1px 2px; border-radius:2px;'>{part_html}</span>"
-        else:
-            # 색칠하지 않을 부분도 \n을 <br>로 변경
-            part_html = html.escape(part).replace('\n', '<br>')
-            result += part_html
-    
-    return result
 # ---------------------------------------------------------------------------------------
 # Streamlit UI - 사이드바
 
@@ -240,10 +180,18 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
+# 차트 PNG 캐시 (서버 프로세스에 하나)
+@st.cache_resource
+def get_figure_cache():
+    return FigureCache(max_items=256)
+
+figure_cache = get_figure_cache()
+data_version = get_data_version()
+
 with st.sidebar:
     st.image("https://img.hankyung.com/photo/202005/01.22651863.1.jpg")
     
-    products = get_products()
+    products = get_products(data_version)
     
     if products.empty:
         st.warning("DB에 상품이 없습니다.")
@@ -252,6 +200,15 @@ with st.sidebar:
         # selectbox에서 상품명 리스트 사용
         option = st.selectbox("상품 선택", products["productName"].tolist())
 
+    # 차트 캐시 상태 (튜닝용, 이전 실행까지의 누적값)
+    with st.expander("차트 캐시", expanded=False):
+        chart_stats = figure_cache.stats()
+        st.caption(
+            f"히트율 {chart_stats['hit_rate']:.0%} "
+            f"({chart_stats['hits']}/{chart_stats['hits'] + chart_stats['misses']}), "
+            f"평균 렌더링 {chart_stats['avg_render_ms']:.0f}ms, 저장 {chart_stats['items']}개"
+        )
+
 st.markdown(f"<h3 style='text-align: center; margin-top: -50px;'>🛍️: {option}</h3>",
     unsafe_allow_html=True)
 
@@ -260,7 +217,7 @@ if option:
     # 선택된 상품의 productID 가져오기
     product_id = products.loc[products["productName"] == option, "productID"].iloc[0]
     
-    reviews = get_reviews(product_id)
+    reviews = get_reviews(data_version, product_id)
     
 
 col1, col2, col3 = st.columns([0.8, 3, 1.5])
@@ -268,7 +225,7 @@ col1, col2, col3 = st.columns([0.8, 3, 1.5])
 # 리뷰 평점, 리뷰 수 
 with col1:
     if option:
-        rating, review_count = get_rating_and_count(product_id)
+        rating, review_count = get_rating_and_count(data_version, product_id)
         max_rating = 5
         percent = rating / max_rating * 100  if max_rating else 0# 채울 비율 %
     else:
@@ -313,7 +270,7 @@ with col1:
     
 
 # 리뷰 AI 분석 
-categories = get_categories()
+categories = get_categories(data_version)
 
 with col2:
     st.markdown("<h4 style='text-align: center; margin-top: 20px;'>리뷰 AI 분석</h4>", unsafe_allow_html=True)
@@ -353,55 +310,25 @@ with col2:
         with bar_containers[i]:
 
             # (1) 긍정부정 파이차트
-            sentiment_df = get_sentiment_count(product_id, category_id)
+            sentiment_df = get_sentiment_count(data_version, product_id, category_id)
             if not sentiment_df.empty:
-                fig, ax = plt.subplots()
-                colors = ["#49CBF3", "#FF7D73"]
-                wedgeprops={'width': 0.55, 'edgecolor': 'w', 'linewidth': 4}
-                wedges, _ = ax.pie(
-                    sentiment_df["count"],
-                    labels=None,
-                    startangle=90,
-                    colors=colors,
-                    wedgeprops=wedgeprops
-                )
-                ax.legend(
-                    wedges,
-                    sentiment_df["sentiment"],
-                    loc="upper center",
-                    bbox_to_anchor=(0.5, -0.1),
-                    fontsize=16,
-                    ncol=len(sentiment_df)
-                )
-                st.pyplot(fig)
+                st.image(sentiment_pie_png(figure_cache, sentiment_df), use_container_width=True)
             else:
                 st.info("해당 카테고리 키워드가 포함된 리뷰가 없습니다.")
 
             # (2) 키워드 상위 3개 바차트
-            keyword_df = get_keyword_count_by_category(product_id, category_id).head(3)
+            keyword_df = get_keyword_count_by_category(data_version, product_id, category_id).head(3)
             if not keyword_df.empty:
-                colors = ["#87C9FF", "#FFE083", "#ED87FF"]
-                fig2, ax2 = plt.subplots()
-                bars2 = ax2.bar(keyword_df['keyword'], keyword_df['count'], color=colors)
-                ax2.set_xticklabels([])
-                ax2.legend(
-                    bars2,
-                    keyword_df["keyword"],
-                    loc="upper center",
-                    bbox_to_anchor=(0.5, -0.1),
-                    fontsize=19,
-                    ncol=len(keyword_df)
-                )
-                st.pyplot(fig2)
+                st.image(keyword_bar_png(figure_cache, keyword_df), use_container_width=True)
             else:
                 st.info("키워드 없음")
 
             # (3) 리뷰 보여주기
-            review_df = get_reviews_by_category(product_id, category_id, limit=5)
+            review_df = get_reviews_by_category(data_version, product_id, category_id, limit=5)
 
             if not review_df.empty:
                 # 키워드별 긍/부정 정보 불러오기
-                keyword_sentiment_df = get_keywords_by_sentiment(product_id, category_id)
+                keyword_sentiment_df = get_keywords_by_sentiment(data_version, product_id, category_id)
 
                 # {keyword: color} 매핑 만들기
                 keyword_colors = {}
@@ -411,12 +338,16 @@ with col2:
                     else:
                         keyword_colors[row["keyword"]] = "#fdaaaa"   # 연한 빨강
 
-                for _, row in review_df.iterrows():
-                    keywords = row["keywords"].split(",") if row["keywords"] else []
+                review_keywords = [row["keywords"].split(",") if row["keywords"] else [] for _, row in review_df.iterrows()]
+
+                # (상품, 카테고리) 키워드 전체로 하이라이트 오토마톤 한 번만 생성 (캐시)
+                matcher = get_matcher(tuple(sorted({k for keywords in review_keywords for k in keywords})))
+
+                for (_, row), keywords in zip(review_df.iterrows(), review_keywords):
                     colors = [keyword_colors.get(k, "#FFEB99") for k in keywords]  # 기본은 노랑
 
                     highlighted_comment = highlight_multiple_substrings(
-                        row["comment"], keywords, colors
+                        row["comment"], keywords, colors, matcher
                     )
 
                     review_html = f"""
@@ -443,7 +374,7 @@ with col3:
     if option:
         # 선택된 상품의 productID 가져오기
         product_id = products.loc[products["productName"] == option, "productID"].iloc[0]
-        reviews = get_keyword_count(product_id)
+        reviews = get_keyword_count(data_version, product_id)
 
         if reviews.empty:
             st.info("선택한 상품에 대한 키워드가 없습니다.")
@@ -0,0 +1,116 @@
+import hashlib
+import io
+import json
+import threading
+import time
+from collections import OrderedDict
+import matplotlib.pyplot as plt
+
+PIE_COLORS = ["#49CBF3", "#FF7D73"]
+BAR_COLORS = ["#87C9FF", "#FFE083", "#ED87FF"]
+
+
+# 렌더링된 차트 PNG 캐시 (LRU)
+# - 키: 그릴 데이터 + 스타일의 해시
+# - 렌더링 후 figure는 바로 닫아서 Streamlit 서버 메모리 누수 방지
+class FigureCache:
+    def __init__(self, max_items=256, dpi=200):
+        self.max_items = max_items
+        self.dpi = dpi
+        self.images = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.render_seconds = 0.0
+
+    @staticmethod
+    def make_key(kind, data, style):
+        raw = json.dumps([kind, data, style, plt.rcParams["font.family"]],
+                         ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    # 캐시에 있으면 PNG 바이트 반환, 없으면 render(data, style)로 그려서 저장
+    def get_or_render(self, kind, data, style, render):
+        key = self.make_key(kind, data, style)
+        with self.lock:
+            if key in self.images:
+                self.images.move_to_end(key)
+                self.hits += 1
+                return self.images[key]
+
+        start = time.perf_counter()
+        fig = render(data, style)
+        try:
+            buf = io.BytesIO()
+            fig.savefig(buf, format="png", dpi=self.dpi, bbox_inches="tight")
+        finally:
+            plt.close(fig)
+        png = buf.getvalue()
+        elapsed = time.perf_counter() - start
+
+        with self.lock:
+            self.misses += 1
+            self.render_seconds += elapsed
+            self.images[key] = png
+            while len(self.images) > self.max_items:
+                self.images.popitem(last=False)
+        return png
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "items": len(self.images),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "avg_render_ms": self.render_seconds / self.misses * 1000 if self.misses else 0.0,
+        }
+
+
+# 긍정/부정 도넛 차트
+def render_sentiment_pie(data, style):
+    fig, ax = plt.subplots()
+    wedges, _ = ax.pie(
+        data["count"],
+        labels=None,
+        startangle=90,
+        colors=style["colors"],
+        wedgeprops=style["wedgeprops"]
+    )
+    ax.legend(
+        wedges,
+        data["sentiment"],
+        loc="upper center",
+        bbox_to_anchor=(0.5, -0.1),
+        fontsize=style["fontsize"],
+        ncol=len(data["sentiment"])
+    )
+    return fig
+
+
+# 키워드 상위 N개 바차트
+def render_keyword_bar(data, style):
+    fig, ax = plt.subplots()
+    bars = ax.bar(data["keyword"], data["count"], color=style["colors"])
+    ax.set_xticklabels([])
+    ax.legend(
+        bars,
+        data["keyword"],
+        loc="upper center",
+        bbox_to_anchor=(0.5, -0.1),
+        fontsize=style["fontsize"],
+        ncol=len(data["keyword"])
+    )
+    return fig
+
+
+def sentiment_pie_png(cache, sentiment_df):
+    data = {"sentiment": sentiment_df["sentiment"].tolist(), "count": [int(c) for c in sentiment_df["count"]]}
+    style = {"colors": PIE_COLORS, "wedgeprops": {'width': 0.55, 'edgecolor': 'w', 'linewidth': 4}, "fontsize": 16}
+    return cache.get_or_render("sentiment_pie", data, style, render_sentiment_pie)
+
+
+def keyword_bar_png(cache, keyword_df):
+    data = {"keyword": keyword_df["keyword"].tolist(), "count": [int(c) for c in keyword_df["count"]]}
+    style = {"colors": BAR_COLORS, "fontsize": 19}
+    return cache.get_or_render("keyword_bar", data, style, render_keyword_bar)